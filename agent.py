@@ -1,51 +1,337 @@
 import numpy as np
-import pickle 
+import pickle
+import os
+
+# Simplified states are 4 queue counts capped at 20, so they fit a fixed table
+NUM_LEVELS = 21
+NUM_STATES = NUM_LEVELS ** 4
+NUM_ACTIONS = 4
+GREEN_BONUS = 0.05
+STATE_WEIGHTS = np.array([NUM_LEVELS ** 3, NUM_LEVELS ** 2, NUM_LEVELS, 1])
+
+def encode_state(state):
+    a, b, c, d = state
+    return ((int(a) * NUM_LEVELS + int(b)) * NUM_LEVELS + int(c)) * NUM_LEVELS + int(d)
+
+def encode_states(states):
+    return np.asarray(states, dtype=np.int64) @ STATE_WEIGHTS
+
+def decode_states(indices):
+    indices = np.asarray(indices, dtype=np.int64)
+    return (indices[..., None] // STATE_WEIGHTS) % NUM_LEVELS
+
+def greedy_actions(q_rows, current_green):
+    # Batched version of the choose_action tie-break: the current green gets a
+    # small bonus so the agent does not flip between equally good phases
+    q = np.array(q_rows, dtype=np.float64, ndmin=2)
+    q[np.arange(len(q)), current_green] += GREEN_BONUS
+    return np.argmax(q, axis=1)
+
+def dense_path(filename):
+    return os.path.splitext(filename)[0] + ".npy"
+
+def dict_to_dense(q_dict):
+    table = np.zeros((NUM_STATES, NUM_ACTIONS), dtype=np.float32)
+    for (state, action), q in q_dict.items():
+        table[encode_state(state), action] = q
+    return table
+
+def dense_to_dict(table):
+    rows, actions = np.nonzero(table)
+    states = decode_states(rows)
+    return {(tuple(int(c) for c in s), int(a)): float(table[r, a])
+            for s, r, a in zip(states, rows, actions)}
+
+class ReplayBuffer:
+    # Preallocated ring buffer of (state, action, reward, next_state). The state
+    # columns are sized from the first state added: int16 for integer states
+    # (the simplified queue counts), float32 otherwise (feature states). With
+    # prioritized=True, transitions are sampled in proportion to |TD error|^alpha
+    # and the returned weights correct for that bias with exponent beta, which
+    # rises linearly to 1 over beta_steps samples (constant if beta_steps is None).
+    def __init__(self, capacity=50000, prioritized=False, alpha=0.6, beta=0.4, beta_steps=None, seed=None):
+        self.capacity = capacity
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta_start = beta
+        self.beta = beta
+        self.beta_steps = beta_steps
+        self.samples = 0
+        self.rng = np.random.default_rng(seed)
+
+        self.states = None
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = None
+        self.priorities = np.zeros(capacity, dtype=np.float32)
+        self.max_priority = 1.0
+        self.index = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _allocate(self, state):
+        integer = all(isinstance(v, (int, np.integer)) for v in state)
+        dtype = np.int16 if integer else np.float32
+        self.states = np.zeros((self.capacity, len(state)), dtype=dtype)
+        self.next_states = np.zeros((self.capacity, len(state)), dtype=dtype)
+
+    def add(self, state, action, reward, next_state):
+        if self.states is None:
+            self._allocate(state)
+        elif len(state) != self.states.shape[1]:
+            raise ValueError(f"state has {len(state)} values, the buffer holds {self.states.shape[1]}")
+        i = self.index
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        # New transitions are replayed at least once before their error is known
+        self.priorities[i] = self.max_priority
+        self.index = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size):
+        self.samples += 1
+        if self.beta_steps:
+            fraction = min(1.0, self.samples / self.beta_steps)
+            self.beta = self.beta_start + fraction * (1.0 - self.beta_start)
+        if self.prioritized:
+            p = self.priorities[:self.size] ** self.alpha
+            p /= p.sum()
+            idx = self.rng.choice(self.size, batch_size, p=p)
+            weights = (self.size * p[idx]) ** -self.beta
+            weights /= weights.max()
+        else:
+            idx = self.rng.integers(0, self.size, batch_size)
+            weights = np.ones(batch_size)
+        return idx, self.states[idx], self.actions[idx], self.rewards[idx], self.next_states[idx], weights
+
+    def update_priorities(self, idx, td_errors):
+        self.priorities[idx] = np.abs(td_errors) + 1e-3
+        self.max_priority = max(self.max_priority, float(self.priorities[idx].max()))
 
 class QLearner:
-    def __init__(self, learning_rate=0.01, discount_factor=0.9, exploration_rate=1.0):
-        self.q_table = {}
+    def __init__(self, learning_rate=0.01, discount_factor=0.9, exploration_rate=1.0, dense=False):
+        # dense=True keeps the Q-table as a (NUM_STATES, 4) float32 array
+        # instead of a dict keyed by (state, action)
+        self.dense = dense
+        # Flat table offset of each state seen so far (at most NUM_STATES
+        # entries): a dict hit is several times cheaper than encode_state
+        self._offsets = {}
+        self.q_table = np.zeros((NUM_STATES, NUM_ACTIONS), dtype=np.float32) if dense else {}
         self.lr = learning_rate
         self.gamma = discount_factor
         self.epsilon = exploration_rate
         self.actions = [0, 1, 2, 3]
-        self.last_action = 0 
+        self.last_action = 0
+
+    @property
+    def q_table(self):
+        return self._q_table
+
+    @q_table.setter
+    def q_table(self, table):
+        if self.dense:
+            # reshape(-1) is only a view of a contiguous table
+            table = np.ascontiguousarray(table)
+        self._q_table = table
+        # Flat view of a dense table, so the per-step paths index it with one
+        # Python int (state * NUM_ACTIONS + action)
+        self._flat = table.reshape(-1) if self.dense else None
+
+    def _offset(self, state):
+        offset = self._offsets.get(state)
+        if offset is None:
+            offset = self._offsets[state] = encode_state(state) * NUM_ACTIONS
+        return offset
 
     def get_q_value(self, state, action):
+        if self.dense:
+            return self._flat.item(self._offset(state) + action)
         return self.q_table.get((state, action), 0.0)
 
     def choose_action(self, state, current_green):
         if np.random.random() < self.epsilon:
             return np.random.choice(self.actions)
 
+        if self.dense:
+            # Four floats are cheaper to compare as a list than as an array
+            s = self._offset(state)
+            q_values = self._flat[s:s + NUM_ACTIONS].tolist()
+            q_values[current_green] += GREEN_BONUS
+            return self.actions[q_values.index(max(q_values))]
+
         q_values = []
         for a in self.actions:
             q = self.get_q_value(state, a)
             if a == current_green:
-                q += 0.05  
+                q += GREEN_BONUS
             q_values.append(q)
 
         return self.actions[np.argmax(q_values)]
 
 
     def update_q_value(self, state, action, reward, next_state):
+        if self.dense:
+            # .item() returns a Python float, so the arithmetic stays off NumPy scalars
+            i = self._offset(state) + action
+            current_q = self._flat.item(i)
+            ns = self._offset(next_state)
+            next_max_q = max(self._flat[ns:ns + NUM_ACTIONS].tolist())
+            self._flat[i] = current_q + self.lr * (reward + self.gamma * next_max_q - current_q)
+            return
+
         current_q = self.get_q_value(state, action)
         next_max_q = max([self.get_q_value(next_state, a) for a in self.actions])
-        
+
         #Bellman Equation
         new_q = current_q + self.lr * (reward + self.gamma * next_max_q - current_q)
         self.q_table[(state, action)] = new_q
 
+    def replay_update(self, buffer, batch_size=64):
+        # One minibatch of Bellman updates from a ReplayBuffer; returns the TD errors.
+        # Both table types compute every TD error from the table as it was before
+        # the batch, then add the updates, summed where a (state, action) pair
+        # repeats, so dict and dense learn the same from the same batch.
+        if buffer.states is None or buffer.states.shape[1] != 4 or buffer.states.dtype.kind == 'f':
+            raise ValueError("QLearner replays only simplified (4 queue count) states")
+        idx, states, actions, rewards, next_states, weights = buffer.sample(batch_size)
+
+        if not self.dense:
+            td_errors = np.zeros(batch_size)
+            keys = []
+            for i in range(batch_size):
+                state, next_state = tuple(states[i].tolist()), tuple(next_states[i].tolist())
+                action = int(actions[i])
+                next_max_q = max(self.get_q_value(next_state, a) for a in self.actions)
+                td_errors[i] = rewards[i] + self.gamma * next_max_q - self.get_q_value(state, action)
+                keys.append((state, action))
+            for key, td_error, weight in zip(keys, td_errors.tolist(), weights.tolist()):
+                self.q_table[key] = self.q_table.get(key, 0.0) + self.lr * weight * td_error
+        else:
+            s, ns = encode_states(states), encode_states(next_states)
+            actions = actions.astype(np.int64)
+            td_errors = rewards + self.gamma * self.q_table[ns].max(axis=1) - self.q_table[s, actions]
+            # add.at so repeated (state, action) pairs in a batch all count
+            np.add.at(self.q_table, (s, actions), (self.lr * weights * td_errors).astype(np.float32))
+
+        if buffer.prioritized:
+            buffer.update_priorities(idx, td_errors)
+        return td_errors
+
     def save_model(self, filename="traffic_brain.pkl"):
-        with open(filename, 'wb') as f:
-            pickle.dump(self.q_table, f)
+        if self.dense:
+            # Raw .npy next to the pickle name so it can be memory-mapped on load
+            filename = dense_path(filename)
+            np.save(filename, self.q_table)
+        else:
+            with open(filename, 'wb') as f:
+                pickle.dump(self.q_table, f)
         print(f"Brain saved to {filename}")
 
-    def load_model(self, filename="traffic_brain.pkl"):
+    def load_model(self, filename="traffic_brain.pkl", mmap_mode=None):
+        if self.dense and os.path.exists(dense_path(filename)):
+            self.q_table = np.load(dense_path(filename), mmap_mode=mmap_mode)
+            print(f"Brain loaded from {dense_path(filename)}")
+            return True
         try:
             with open(filename, 'rb') as f:
-                self.q_table = pickle.load(f)
+                q_table = pickle.load(f)
+            self.q_table = dict_to_dense(q_table) if self.dense else q_table
             print(f"Brain loaded from {filename}")
             return True
         except FileNotFoundError:
             print("No saved brain found. Starting fresh.")
-            return False
\ No newline at end of file
+            return False
+
+class TileCodingLearner:
+    # Linear Q-function over hashed tile codings, with the QLearner interface.
+    # A state is any fixed-length tuple of numbers in [low, high] (by default
+    # the simplified queue counts; pass simulation.FEATURE_LOW / FEATURE_HIGH
+    # to learn from TrafficEnv._get_feature_state()). Every tiling maps the
+    # state to one of memory_size weight rows, so memory is fixed however many
+    # features the state has.
+    def __init__(self, learning_rate=0.1, discount_factor=0.9, exploration_rate=1.0,
+                 low=(0,) * 4, high=(NUM_LEVELS - 1,) * 4, tiles=6, tilings=8, memory_size=2 ** 16, seed=0):
+        self.lr = learning_rate
+        self.gamma = discount_factor
+        self.epsilon = exploration_rate
+        self.actions = [0, 1, 2, 3]
+        self.last_action = 0
+        self.low = np.asarray(low, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.tiles = tiles
+        self.tilings = tilings
+        self.memory_size = memory_size
+        self.seed = seed
+        self._build_hash()
+        self.weights = np.zeros((memory_size, NUM_ACTIONS), dtype=np.float32)
+        self._cache = (None, None)
+
+    def _build_hash(self):
+        dims = len(self.low)
+        self.scale = self.tiles / np.maximum(self.high - self.low, 1e-9)
+        # Tiling k is shifted by k/tilings of a tile, times a different odd step per dimension
+        self.offsets = (np.arange(self.tilings)[:, None] * (2 * np.arange(dims) + 1)[None, :] / self.tilings) % 1.0
+        rng = np.random.default_rng(self.seed)
+        self.hash_mult = rng.integers(1, 2 ** 31, dims, dtype=np.uint64) * 2 + 1
+        self.tiling_ids = np.arange(self.tilings, dtype=np.uint64) * np.uint64(2654435761)
+
+    def active_tiles(self, states):
+        # Weight rows hit by each state: (..., tilings) for states shaped (..., dims)
+        x = (np.clip(np.asarray(states, dtype=np.float64), self.low, self.high) - self.low) * self.scale
+        coords = np.floor(x[..., None, :] + self.offsets).astype(np.uint64)
+        return ((coords * self.hash_mult).sum(axis=-1) + self.tiling_ids) % np.uint64(self.memory_size)
+
+    def _tiles(self, state):
+        # choose_action and update_q_value usually ask for the same state in a row
+        if self._cache[0] != state:
+            self._cache = (state, self.active_tiles(state).astype(np.int64))
+        return self._cache[1]
+
+    def q_values(self, states):
+        return self.weights[self.active_tiles(states).astype(np.int64)].sum(axis=-2)
+
+    def get_q_value(self, state, action):
+        return float(self.weights[self._tiles(state), action].sum())
+
+    def choose_action(self, state, current_green):
+        if np.random.random() < self.epsilon:
+            return np.random.choice(self.actions)
+
+        q_values = self.weights[self._tiles(state)].sum(axis=0).tolist()
+        q_values[current_green] += GREEN_BONUS
+        return self.actions[q_values.index(max(q_values))]
+
+    def update_q_value(self, state, action, reward, next_state):
+        idx = self._tiles(state)
+        current_q = float(self.weights[idx, action].sum())
+        # Looked up last so the next choose_action(next_state) hits the cache
+        next_max_q = float(self.weights[self._tiles(next_state)].sum(axis=0).max())
+        # Gradient of a sum of tile weights: every active tile moves by lr / tilings of the error
+        td_error = reward + self.gamma * next_max_q - current_q
+        self.weights[idx, action] += self.lr / self.tilings * td_error
+
+    def save_model(self, filename="traffic_brain.pkl"):
+        filename = os.path.splitext(filename)[0] + ".npz"
+        np.savez_compressed(filename, weights=self.weights, low=self.low, high=self.high,
+                            tiles=self.tiles, tilings=self.tilings, seed=self.seed)
+        print(f"Brain saved to {filename}")
+
+    def load_model(self, filename="traffic_brain.pkl"):
+        filename = os.path.splitext(filename)[0] + ".npz"
+        try:
+            data = np.load(filename)
+        except FileNotFoundError:
+            print("No saved brain found. Starting fresh.")
+            return False
+        self.weights = data['weights']
+        self.low, self.high = data['low'], data['high']
+        self.tiles, self.tilings, self.seed = int(data['tiles']), int(data['tilings']), int(data['seed'])
+        self.memory_size = len(self.weights)
+        self._build_hash()
+        self._cache = (None, None)
+        print(f"Brain loaded from {filename}")
+        return True
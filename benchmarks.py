@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import numpy as np
+from simulation import MAX_QUEUE, TrafficSimulation, TrafficEnv
+from agent import QLearner
+
+QUEUE_LENGTHS = [1, 5, 10, MAX_QUEUE]
+LEAVING_COUNTS = [0, 4, 8]
+ARRIVAL_RATES = [0.1, 0.2, 0.4]
+
+def measure(fn, setup=None, batch=50, min_time=0.2, repeats=3):
+    # Best-of-N rate of fn() calls per second; setup() runs untimed before each batch
+    best = 0.0
+    for _ in range(repeats):
+        calls, elapsed = 0, 0.0
+        while elapsed < min_time:
+            if setup: setup()
+            start = time.perf_counter()
+            for _ in range(batch):
+                fn()
+            elapsed += time.perf_counter() - start
+            calls += batch
+        best = max(best, calls / elapsed)
+    return best
+
+def fill_sim(sim, queue_length, leaving):
+    # Every lane queued to queue_length, plus `leaving` cars just released into the junction
+    sim.reset()
+    for lane in range(4):
+        for _ in range(queue_length + (leaving + 3 - lane) // 4):
+            sim.add_car(lane, instant=True)
+    for i in range(leaving):
+        sim.release_car(i % 4)
+
+def bench_env_step(min_time):
+    results = {}
+    for rate in ARRIVAL_RATES:
+        np.random.seed(0)
+        env = TrafficEnv()
+        env.arrival_prob = rate
+        actions = np.random.randint(0, 4, 4096).tolist()
+        it = iter(range(1 << 62))
+        def step():
+            env.step(actions[next(it) % 4096])
+        results[f"env_step/arrival={rate}"] = measure(step, env.reset, batch=150, min_time=min_time)
+
+    from queue_env import QueueTrafficEnv
+    np.random.seed(0)
+    env = QueueTrafficEnv()
+    results["queue_env_step"] = measure(lambda: env.step(actions[next(it) % 4096]), env.reset,
+                                        batch=150, min_time=min_time)
+    return results
+
+def bench_update_physics(min_time):
+    results = {}
+    sim = TrafficSimulation()
+    for q in QUEUE_LENGTHS:
+        for leaving in LEAVING_COUNTS:
+            results[f"update_physics/queue={q}/leaving={leaving}"] = measure(
+                lambda: sim.update_physics(green_lane=-1), lambda: fill_sim(sim, q, leaving),
+                batch=20, min_time=min_time)
+    return results
+
+def bench_clearance(min_time):
+    # One all-red phase switch per call, right after four cars were released
+    results = {}
+    sim = TrafficSimulation()
+    for q in QUEUE_LENGTHS:
+        results[f"clear_intersection/queue={q}"] = measure(
+            sim.clear_intersection, lambda: fill_sim(sim, q, 4), batch=1, min_time=min_time)
+    return results
+
+def bench_draw(min_time):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from function import TrafficVisualizer
+    results = {}
+    visualizer = TrafficVisualizer()
+    visualizer.fast_forward = True
+    sim = visualizer.sim
+    for q in QUEUE_LENGTHS:
+        for leaving in LEAVING_COUNTS:
+            def setup():
+                fill_sim(sim, q, leaving)
+                visualizer.particles.clear()
+                # A few ticks so there is exhaust and braking to draw
+                for _ in range(10):
+                    sim.update_physics(green_lane=-1)
+            results[f"draw/queue={q}/leaving={leaving}"] = measure(
+                lambda: visualizer.draw(active_index=0), setup, batch=20, min_time=min_time)
+    visualizer.close()
+    return results
+
+def bench_agent(min_time):
+    results = {}
+    rng = np.random.RandomState(0)
+    states = [tuple(int(c) for c in s) for s in rng.randint(0, MAX_QUEUE + 1, (1024, 4))]
+    for dense in (False, True):
+        agent = QLearner(dense=dense)
+        agent.epsilon = 0.0
+        for i, s in enumerate(states):
+            agent.update_q_value(s, i % 4, rng.rand(), states[i - 1])
+        name = "dense" if dense else "dict"
+        it = iter(range(1 << 62))
+        def choose():
+            agent.choose_action(states[next(it) % 1024], 0)
+        def update():
+            i = next(it) % 1024
+            agent.update_q_value(states[i], i % 4, 0.1, states[i - 1])
+        results[f"choose_action/{name}"] = measure(choose, batch=1000, min_time=min_time)
+        results[f"update_q_value/{name}"] = measure(update, batch=1000, min_time=min_time)
+    return results
+
+def bench_vec_env(min_time):
+    from vec_env import VecTrafficEnv
+    results = {}
+    for n in (64, 1024):
+        env = VecTrafficEnv(n, seed=0)
+        actions = np.random.RandomState(0).randint(0, 4, (16, n))
+        it = iter(range(1 << 62))
+        # Reported as single-intersection steps per second
+        rate = measure(lambda: env.step(actions[next(it) % 16]), env.reset, batch=10, min_time=min_time)
+        results[f"vec_env_step/envs={n}"] = rate * n
+    return results
+
+def bench_network(min_time):
+    from network import TrafficNetwork
+    results = {}
+    for rows, cols in ((1, 10), (10, 10)):
+        net = TrafficNetwork(rows, cols, seed=0)
+        actions = np.random.RandomState(0).randint(0, 4, (16, net.num_envs))
+        it = iter(range(1 << 62))
+        rate = measure(lambda: net.step(actions[next(it) % 16]), net.reset, batch=10, min_time=min_time)
+        results[f"network_step/{rows}x{cols}"] = rate * net.num_envs
+    return results
+
+SUITES = {
+    'env_step': bench_env_step,
+    'update_physics': bench_update_physics,
+    'clearance': bench_clearance,
+    'draw': bench_draw,
+    'agent': bench_agent,
+    'vec_env': bench_vec_env,
+    'network': bench_network,
+}
+
+def run_benchmarks(suites=None, min_time=0.2):
+    random.seed(0)
+    results = {}
+    for name in suites or SUITES:
+        print(f"Running {name}...")
+        results.update(SUITES[name](min_time))
+    return {
+        'meta': {'python': sys.version.split()[0], 'numpy': np.__version__,
+                 'platform': platform.platform(), 'time': time.strftime("%Y-%m-%d %H:%M:%S")},
+        'results': results,
+    }
+
+def compare(current, baseline, threshold=0.10):
+    # Returns the benchmarks that got slower than baseline by more than threshold
+    regressions = []
+    print(f"\n{'benchmark':<42}{'baseline':>14}{'current':>14}{'change':>9}")
+    for name, rate in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<42}{'-':>14}{rate:>14.0f}{'new':>9}")
+            continue
+        change = rate / base - 1.0
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  << REGRESSION"
+        print(f"{name:<42}{base:>14.0f}{rate:>14.0f}{change:>+8.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Steps-per-second benchmarks for the simulation, renderer and agent")
+    parser.add_argument('--suite', action='append', choices=list(SUITES), help="run only these suites")
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds per measurement")
+    parser.add_argument('--out', default="bench_baseline.json", help="where to write the results")
+    parser.add_argument('--compare', help="baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    current = run_benchmarks(args.suite, args.min_time)
+    with open(args.out, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"Results saved to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\nNo regressions.")
+    else:
+        for name, rate in current['results'].items():
+            print(f"{name:<42}{rate:>14.0f} /s")
+
+
+if __name__ == "__main__":
+    main()
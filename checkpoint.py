@@ -0,0 +1,60 @@
+import os
+import pickle
+import random
+import numpy as np
+
+# Everything needed to carry on a training run from the end of an episode:
+# the learner's table, epsilon, the episode counter, the reward history and
+# the state of both RNGs the simulation draws from. A checkpoint saved at an
+# episode boundary resumes exactly; one saved mid-episode (main.py on Ctrl-C)
+# keeps that episode's Q updates and RNG draws but not its reward, so the
+# resumed run is close to, not identical with, an uninterrupted one.
+
+def save_checkpoint(filename, agent, episode, rewards_history):
+    checkpoint = {
+        'episode': episode,
+        'epsilon': agent.epsilon,
+        'rewards_history': list(rewards_history),
+        'np_random': np.random.get_state(),
+        'random': random.getstate(),
+    }
+    if hasattr(agent, 'weights'):
+        checkpoint['weights'] = agent.weights
+    else:
+        checkpoint['q_table'] = agent.q_table
+
+    # Write next to the target and rename over it, so a crash mid-write
+    # leaves the previous checkpoint intact
+    directory = os.path.dirname(os.path.abspath(filename))
+    tmp = os.path.join(directory, f".checkpoint-{os.getpid()}-{os.urandom(4).hex()}.tmp")
+    # Created 0666 so the kernel applies the umask, giving the same permissions
+    # as the brain and the other files the project writes (mkstemp would give
+    # 0600, and reading the umask means setting it, which races other threads)
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filename)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def load_checkpoint(filename):
+    try:
+        with open(filename, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+def restore_checkpoint(checkpoint, agent):
+    # Puts the agent and both RNGs back; returns (next episode, rewards_history)
+    if 'weights' in checkpoint:
+        agent.weights = checkpoint['weights']
+    else:
+        agent.q_table = checkpoint['q_table']
+    agent.epsilon = checkpoint['epsilon']
+    np.random.set_state(checkpoint['np_random'])
+    random.setstate(checkpoint['random'])
+    return checkpoint['episode'], list(checkpoint['rewards_history'])
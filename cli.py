@@ -0,0 +1,185 @@
+import argparse
+# Everything else is imported inside the subcommands: train, eval and bench
+# never load pygame or matplotlib unless asked to
+
+def make_env(backend):
+    if backend == 'queue':
+        from queue_env import QueueTrafficEnv
+        return QueueTrafficEnv()
+    from simulation import TrafficEnv
+    return TrafficEnv()
+
+def make_agent(args, exploration_rate=1.0):
+    from agent import QLearner
+    return QLearner(learning_rate=args.learning_rate, discount_factor=args.discount_factor,
+                    exploration_rate=exploration_rate, dense=args.dense)
+
+def seed_everything(seed):
+    if seed is None:
+        return
+    import random
+    import numpy as np
+    np.random.seed(seed)
+    random.seed(seed)
+
+def checkpoint_path(args):
+    import os
+    return args.checkpoint or os.path.splitext(args.model)[0] + "_checkpoint.pkl"
+
+def cmd_train(args):
+    import numpy as np
+    from training import run_episode
+    from checkpoint import save_checkpoint, load_checkpoint, restore_checkpoint
+    seed_everything(args.seed)
+    env = make_env(args.backend)
+    agent = make_agent(args)
+    start_episode = 0
+    rewards_history = []
+    if args.resume:
+        # Like main.py: the checkpoint written next to the brain carries epsilon,
+        # the episode counter and both RNG states, so the run picks up its schedule
+        checkpoint = load_checkpoint(checkpoint_path(args))
+        if checkpoint:
+            start_episode, rewards_history = restore_checkpoint(checkpoint, agent)
+        elif agent.load_model(args.model):
+            # A brain without a checkpoint is taken to be a finished run
+            agent.epsilon = args.epsilon_min
+        print(f"Resuming from episode {start_episode + 1} | Epsilon = {agent.epsilon:.2f}")
+
+    episodes_done = start_episode
+    try:
+        for episode in range(start_episode, start_episode + args.episodes):
+            rewards_history.append(run_episode(env, agent, args.steps))
+            if agent.epsilon > args.epsilon_min:
+                agent.epsilon *= args.epsilon_decay
+            episodes_done = episode + 1
+            if episodes_done % 10 == 0:
+                print(f"Episode {episodes_done}/{start_episode + args.episodes}: Reward = {rewards_history[-1]:.2f} "
+                      f"| Epsilon = {agent.epsilon:.2f}")
+    except KeyboardInterrupt:
+        print("Stopped manually.")
+    agent.save_model(args.model)
+    save_checkpoint(checkpoint_path(args), agent, episodes_done, rewards_history)
+
+    if rewards_history:
+        print(f"Last-20 Avg Reward = {np.mean(rewards_history[-20:]):.2f}")
+    if args.plot and rewards_history:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        plt.figure(figsize=(10, 5))
+        plt.plot(np.arange(1, len(rewards_history) + 1), rewards_history, marker='.', linewidth=1)
+        plt.title('Q-Learning Performance')
+        plt.xlabel('Episode')
+        plt.ylabel('Total Reward (Higher is Better)')
+        plt.grid(True)
+        plt.savefig(args.plot)
+        print(f"Learning graph saved to {args.plot}")
+
+def cmd_eval(args):
+    import numpy as np
+    from training import run_episode, run_fixed_time_episode
+    seed_everything(args.seed)
+    env = make_env(args.backend)
+    agent = make_agent(args, exploration_rate=0.0)
+    if not agent.load_model(args.model):
+        return 1
+
+    agent_rewards = [run_episode(env, agent, args.steps) for _ in range(args.episodes)]
+    baseline_rewards = [run_fixed_time_episode(env, args.steps) for _ in range(args.episodes)]
+    print("\n===== Baseline Comparison =====")
+    print(f"Fixed-Time Controller Avg Reward: {np.mean(baseline_rewards):.2f}")
+    print(f"Q-Learning Agent Avg Reward: {np.mean(agent_rewards):.2f}")
+    print(f"Improvement: {np.mean(agent_rewards) - np.mean(baseline_rewards):.2f}")
+
+def cmd_watch(args):
+    from function import TrafficEnv, TrafficVisualizer, RenderSchedule
+    seed_everything(args.seed)
+    visualizer = TrafficVisualizer()
+    env = TrafficEnv(visualizer)
+    env.render_schedule = RenderSchedule()
+    agent = make_agent(args, exploration_rate=0.0)
+    if not agent.load_model(args.model):
+        visualizer.close()
+        return 1
+
+    try:
+        for episode in range(args.episodes):
+            print(f"--- Presentation Episode {episode + 1} ---")
+            state = env.reset()
+            for step in range(args.steps):
+                state, reward = env.step(agent.choose_action(state, env.current_green))
+                if state is None or not env.render(env.current_green):
+                    print("Simulation stopped by user.")
+                    return
+    except KeyboardInterrupt:
+        print("Stopped manually.")
+    finally:
+        visualizer.close()
+
+def cmd_bench(args):
+    import json
+    import sys
+    from benchmarks import run_benchmarks, compare
+    current = run_benchmarks(args.suite, args.min_time)
+    with open(args.out, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"Results saved to {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.threshold):
+            sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Traffic signal Q-learning from the command line")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_run_args(p, episodes):
+        p.add_argument('--episodes', type=int, default=episodes)
+        p.add_argument('--steps', type=int, default=150, help="steps per episode")
+        p.add_argument('--model', default="traffic_brain.pkl")
+        p.add_argument('--dense', action='store_true', help="use the dense .npy Q-table")
+        p.add_argument('--seed', type=int)
+        p.add_argument('--learning-rate', type=float, default=0.01)
+        p.add_argument('--discount-factor', type=float, default=0.9)
+
+    p = sub.add_parser('train', help="train headless and save the brain")
+    add_run_args(p, 200)
+    p.add_argument('--backend', choices=['pixel', 'queue'], default='pixel')
+    p.add_argument('--epsilon-decay', type=float, default=0.99)
+    p.add_argument('--epsilon-min', type=float, default=0.05)
+    p.add_argument('--resume', action='store_true', help="carry on from the saved brain and its checkpoint")
+    p.add_argument('--checkpoint', help="checkpoint file (default: <model>_checkpoint.pkl)")
+    p.add_argument('--plot', help="save the learning graph to this image file")
+    p.set_defaults(func=cmd_train)
+
+    p = sub.add_parser('eval', help="compare a saved brain with the fixed-time controller, headless")
+    add_run_args(p, 20)
+    p.add_argument('--backend', choices=['pixel', 'queue'], default='pixel')
+    p.set_defaults(func=cmd_eval)
+
+    p = sub.add_parser('watch', help="watch a saved brain drive the intersection")
+    add_run_args(p, 5)
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser('bench', help="run the benchmark suite")
+    p.add_argument('--suite', action='append', help="run only these suites (see benchmarks.py)")
+    p.add_argument('--min-time', type=float, default=0.2)
+    p.add_argument('--out', default="bench_baseline.json")
+    p.add_argument('--compare')
+    p.add_argument('--threshold', type=float, default=0.10)
+    p.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args()
+    if args.command == 'bench' and args.suite:
+        # Checked here rather than with choices=, so other commands never import benchmarks
+        from benchmarks import SUITES
+        unknown = sorted(set(args.suite) - set(SUITES))
+        if unknown:
+            parser.error(f"unknown suite {', '.join(unknown)} (choose from {', '.join(sorted(SUITES))})")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
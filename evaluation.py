@@ -0,0 +1,133 @@
+import argparse
+import os
+import time
+import numpy as np
+from multiprocessing import Pool
+from simulation import TrafficEnv, TICK_RATE
+from agent import QLearner
+
+# Held-out evaluation: the greedy agent and fixed-time controllers run on the
+# same seeds. Seed i gives every controller the same arrival stream (common
+# random numbers), so their differences can be compared seed by seed.
+METRICS = ['reward', 'queue', 'wait']
+DEFAULT_GREEN_DURATIONS = [40, 50, 60]
+
+_agent = None
+
+def init_worker(q_table, dense):
+    # Each worker gets its own greedy copy of the brain once, not per episode
+    global _agent
+    _agent = QLearner(exploration_rate=0.0, dense=dense)
+    _agent.q_table = q_table
+
+def make_env(backend, rng):
+    if backend == 'queue':
+        from queue_env import QueueTrafficEnv
+        return QueueTrafficEnv(rng=rng)
+    return TrafficEnv(rng=rng)
+
+def queued_wait(env):
+    # Total ticks waited by the cars still queued
+    if hasattr(env, 'sim'):
+        return sum(car.wait_time for lane in env.sim.lanes for car in lane)
+    t = env.ticks
+    return sum(bank + (t - stop if t > stop else 0) for q in env.queues for bank, stop in q)
+
+def evaluate_episode(env, controller, steps_per_episode=150):
+    # controller is 'agent' or a fixed-time green duration in steps. Returns
+    # total reward, mean cars queued per step and mean wait (s) of a queued car.
+    state = env.reset()
+    total_reward, queued, waited = 0.0, 0, 0
+    for step in range(steps_per_episode):
+        if controller == 'agent':
+            action = _agent.choose_action(state, env.current_green)
+        else:
+            action = (step // controller) % 4
+        state, reward = env.step(action)
+        total_reward += reward
+        queued += sum(state)
+        waited += queued_wait(env)
+    return total_reward, queued / steps_per_episode, waited / TICK_RATE / max(queued, 1)
+
+def run_seeds(job):
+    # One chunk of seeds for one controller, each on its own RNG stream
+    controller, seeds, steps_per_episode, backend = job
+    results = []
+    for seed_seq in seeds:
+        env = make_env(backend, np.random.RandomState(np.random.MT19937(seed_seq)))
+        results.append(evaluate_episode(env, controller, steps_per_episode))
+    return controller, results
+
+def mean_ci(values, z=1.96):
+    # Mean and half-width of its 95% confidence interval (normal approximation)
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        return float(values.mean()), float('nan')
+    return float(values.mean()), float(z * values.std(ddof=1) / np.sqrt(len(values)))
+
+def evaluate(q_table, dense=False, seeds=200, steps_per_episode=150, green_durations=DEFAULT_GREEN_DURATIONS,
+             processes=None, seed=0, backend='pixel', chunk_size=10):
+    # Returns {controller: array (seeds, len(METRICS))}, rows in seed order
+    seed_seqs = np.random.SeedSequence(seed).spawn(seeds)
+    chunks = [seed_seqs[i:i + chunk_size] for i in range(0, seeds, chunk_size)]
+    controllers = ['agent'] + list(green_durations)
+    jobs = [(c, chunk, steps_per_episode, backend) for c in controllers for chunk in chunks]
+
+    results = {c: [] for c in controllers}
+    with Pool(processes, initializer=init_worker, initargs=(q_table, dense)) as pool:
+        # imap keeps job order, so each controller's rows stay in seed order
+        for controller, rows in pool.imap(run_seeds, jobs):
+            results[controller].extend(rows)
+    return {c: np.array(rows) for c, rows in results.items()}
+
+def controller_name(controller):
+    return "Q-Learning Agent" if controller == 'agent' else f"Fixed-Time ({controller} steps)"
+
+def print_report(results):
+    print(f"\n{'Controller':<26}{'Reward':>20}{'Queue (cars)':>20}{'Wait (s)':>20}")
+    for controller, rows in results.items():
+        cells = [f"{m:.2f} ± {h:.2f}" for m, h in (mean_ci(rows[:, i]) for i in range(len(METRICS)))]
+        print(f"{controller_name(controller):<26}" + "".join(f"{c:>20}" for c in cells))
+
+    # Paired differences, agent minus each fixed-time controller on the same seeds
+    agent = results['agent']
+    print("\n===== Agent - Fixed-Time (paired by seed) =====")
+    for controller, rows in results.items():
+        if controller == 'agent':
+            continue
+        cells = [f"{m:+.2f} ± {h:.2f}" for m, h in (mean_ci(agent[:, i] - rows[:, i]) for i in range(len(METRICS)))]
+        print(f"{controller_name(controller):<26}" + "".join(f"{c:>20}" for c in cells))
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a trained brain against fixed-time controllers over many seeds")
+    parser.add_argument('--brain', default="traffic_brain.pkl")
+    parser.add_argument('--dense', action='store_true', help="load the dense .npy Q-table")
+    parser.add_argument('--seeds', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=150)
+    parser.add_argument('--green', type=int, nargs='+', default=DEFAULT_GREEN_DURATIONS,
+                        help="fixed-time green durations in steps")
+    parser.add_argument('--backend', choices=['pixel', 'queue'], default='pixel')
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="save the per-seed results to this .npz")
+    args = parser.parse_args()
+
+    agent = QLearner(exploration_rate=0.0, dense=args.dense)
+    if not agent.load_model(args.brain):
+        return
+
+    print(f"Evaluating {1 + len(args.green)} controllers on {args.seeds} seeds ({args.processes} processes)...")
+    start = time.perf_counter()
+    results = evaluate(agent.q_table, args.dense, args.seeds, args.steps, args.green,
+                       args.processes, args.seed, args.backend)
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+    print_report(results)
+
+    if args.out:
+        np.savez_compressed(args.out, metrics=np.array(METRICS),
+                            **{str(c): rows for c, rows in results.items()})
+        print(f"Results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,20 @@
-import numpy as np
 import pygame
-import time
+import numpy as np
 import random
 import os
+import time
+from simulation import CAR_WIDTH, CAR_LENGTH, TICK_RATE, CarEntity, TrafficSimulation, TrafficEnv
 
-# --- CONSTANTS ---
-CAR_WIDTH = 34    
-CAR_LENGTH = 64   
-GAP_SIZE = 110    
-WAIT_THRESHOLD = 300 
+MAX_PARTICLES = 400
 
 class AssetManager:
     def __init__(self):
         self.images = {}
         self.car_images = [] 
+        # Per sprite, one pre-rotated surface per direction
+        self.car_sprites = []
+        self.particle_discs = {}
+        self.glows = {}
         # Fix: Use absolute path to ensure assets are found
         self.base_path = os.path.dirname(os.path.abspath(__file__))
         self.load_assets()
@@ -38,6 +39,41 @@ class AssetManager:
         self.load_single_image(asset_dir, 'building', "building.png")
         self.load_single_image(asset_dir, 'traffic_light', "traffic_light.png", (40, 100))
 
+        for img in self.car_images:
+            if img is None:
+                self.car_sprites.append(None)
+                continue
+            self.car_sprites.append({
+                'up': img,
+                'down': pygame.transform.rotate(img, 180),
+                'left': pygame.transform.rotate(img, 90),
+                'right': pygame.transform.rotate(img, -90),
+            })
+        self.build_effects()
+
+    def build_effects(self):
+        # Shadows, headlight beams and brake lights only depend on the direction,
+        # so they are rendered once instead of per car per frame
+        self.shadows = {}
+        for d in ['up', 'down', 'left', 'right']:
+            w, h = (CAR_LENGTH, 10) if d in ['left', 'right'] else (CAR_WIDTH, 10)
+            shadow = pygame.Surface((w + 10, h + 10), pygame.SRCALPHA)
+            pygame.draw.ellipse(shadow, (0, 0, 0, 80), (0, 0, w, h))
+            self.shadows[d] = shadow
+
+        self.brake_light = pygame.Surface((10, 10), pygame.SRCALPHA)
+        pygame.draw.circle(self.brake_light, (255, 0, 0, 150), (5, 5), 4)
+
+        beam_len = 60
+        beam = pygame.Surface((beam_len, 40), pygame.SRCALPHA)
+        pygame.draw.polygon(beam, (255, 255, 200, 40), [(0, 10), (0, 30), (beam_len, 40), (beam_len, 0)])
+        self.beams = {
+            'right': beam,
+            'down': pygame.transform.rotate(beam, -90),
+            'up': pygame.transform.rotate(beam, 90),
+            'left': pygame.transform.rotate(beam, 180),
+        }
+
     def load_single_image(self, folder, key, filename, scale=None):
         path = os.path.join(folder, filename)
         try:
@@ -48,186 +84,109 @@ class AssetManager:
             self.images[key] = None
 
     def get_car_image(self, direction, car_index):
-        if not self.car_images or car_index >= len(self.car_images) or self.car_images[car_index] is None:
+        if car_index >= len(self.car_sprites) or self.car_sprites[car_index] is None:
             return None
-        img = self.car_images[car_index].copy()
-        if direction == 'up': rotated = img 
-        elif direction == 'down': rotated = pygame.transform.rotate(img, 180)
-        elif direction == 'left': rotated = pygame.transform.rotate(img, 90)
-        elif direction == 'right': rotated = pygame.transform.rotate(img, -90)
-        return rotated
-
-class Particle:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.size = random.randint(2, 5)
-        self.life = 255
-        self.drift_x = random.uniform(-0.5, 0.5)
-        self.drift_y = random.uniform(-0.5, 0.5)
-
-    def update(self):
-        self.x += self.drift_x
-        self.y += self.drift_y
-        self.size += 0.1 
-        self.life -= 10 
-
-class CarEntity:
-    def __init__(self, lane, stop_pos, start_pos, direction, sprite_index):
-        self.lane = lane
-        self.x = start_pos[0]
-        self.y = start_pos[1]
-        self.direction = direction
-        self.sprite_index = sprite_index
-        self.color = (random.randint(50,255), random.randint(50,255), random.randint(50,255))
-        
-        self.speed = 0
-        self.max_speed = 4.0    
-        # --- SMOOTHNESS UPDATE: Agile Cars ---
-        self.accel = 0.4        
-        self.decel = 0.2        
-        self.state = "approaching" 
-        self.stop_pos_base = stop_pos 
-        self.is_braking = False
-        self.wait_time = 0
-
-    def update(self, car_index_in_queue, gap_spacing=GAP_SIZE): 
-        if self.state == "waiting" and self.speed < 0.1:
-            self.wait_time += 1
-        
-        if self.state == "leaving":
-            self.speed = min(self.speed + 0.3, 6.0) 
-            self.is_braking = False
-            self.move_by_speed() 
+        return self.car_sprites[car_index][direction]
+
+    def get_particle_disc(self, size, alpha):
+        # Particles only take a few dozen (size, fade) values over their life
+        key = (round(size, 1), alpha)
+        disc = self.particle_discs.get(key)
+        if disc is None:
+            disc = pygame.Surface((size*2, size*2), pygame.SRCALPHA)
+            pygame.draw.circle(disc, (100, 100, 100, alpha), (size, size), size)
+            self.particle_discs[key] = disc
+        return disc
+
+    def get_glow(self, color):
+        glow = self.glows.get(color)
+        if glow is None:
+            glow = pygame.Surface((20, 20), pygame.SRCALPHA)
+            pygame.draw.circle(glow, (*color, 50), (10, 10), 9)
+            self.glows[color] = glow
+        return glow
+
+class ParticlePool:
+    # Exhaust puffs as fixed-capacity NumPy arrays: one vectorized update per
+    # tick, dead puffs compacted away in place, and new puffs dropped once
+    # the pool is full so heavy traffic cannot slow frames down.
+    def __init__(self, capacity=MAX_PARTICLES):
+        self.capacity = capacity
+        self.count = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.size = np.zeros(capacity)
+        self.life = np.zeros(capacity, dtype=np.int32)
+        self.drift_x = np.zeros(capacity)
+        self.drift_y = np.zeros(capacity)
+        # Own generator so effects never touch the RNG that drives arrivals
+        self.rng = np.random.default_rng()
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, xs, ys):
+        n = min(len(xs), self.capacity - self.count)
+        if n <= 0:
             return
+        i, j = self.count, self.count + n
+        self.x[i:j] = xs[:n]
+        self.y[i:j] = ys[:n]
+        self.size[i:j] = self.rng.integers(2, 6, n)
+        self.life[i:j] = 255
+        self.drift_x[i:j] = self.rng.uniform(-0.5, 0.5, n)
+        self.drift_y[i:j] = self.rng.uniform(-0.5, 0.5, n)
+        self.count = j
 
-        if self.direction == 'down':
-            target = self.stop_pos_base - (car_index_in_queue * gap_spacing)
-            dist = target - self.y
-        elif self.direction == 'up':
-            target = self.stop_pos_base + (car_index_in_queue * gap_spacing)
-            dist = self.y - target
-        elif self.direction == 'left':
-            target = self.stop_pos_base + (car_index_in_queue * gap_spacing)
-            dist = self.x - target
-        elif self.direction == 'right':
-            target = self.stop_pos_base - (car_index_in_queue * gap_spacing)
-            dist = target - self.x
-
-        if dist > 40: 
-            self.speed = min(self.speed + self.accel, self.max_speed)
-            self.is_braking = False
-            self.state = "approaching"
-        elif dist > 1: 
-            # Smooth braking that doesn't "jump" speed
-            target_speed = max(0.0, dist * 0.3)
-            self.speed = min(self.max_speed, target_speed) 
-            self.is_braking = True 
-        else: 
-            self.speed = 0
-            self.is_braking = True 
-            self.state = "waiting"
-
-        if self.speed > 0:
-            self.move_by_speed() 
-
-    def move_by_speed(self):
-        if self.direction == 'down': self.y += self.speed
-        elif self.direction == 'up': self.y -= self.speed
-        elif self.direction == 'left': self.x -= self.speed
-        elif self.direction == 'right': self.x += self.speed
-
-class TrafficEnv:
-    def __init__(self, visualizer=None):
-        self.action_space = [0, 1, 2, 3] 
-        self.visualizer = visualizer
-        self.current_green = 0 
-        self.steps_in_current_phase = 0
-        self.min_duration = 40  
-        self.max_green_duration = 60 
-        self.prev_wait = 0
-        self.reset()
-
-    @property
-    def state(self):
-        if self.visualizer:
-            return np.array([len(l) for l in self.visualizer.lanes])
-        return np.zeros(4, dtype=int)
-
-    def _get_simplified_state(self):
-        return tuple(min(c, 20) for c in self.state)
-
-    def reset(self):
-        if self.visualizer:
-            self.visualizer.reset_cars()
-            for i in range(4):
-                count = np.random.randint(1, 4) 
-                for _ in range(count):
-                    self.visualizer.add_car(i, instant=True)
-        self.current_green = 0 
-        self.steps_in_current_phase = 0
-        self.prev_wait = 0
-        return self._get_simplified_state()
-
-    def step(self, action):
-        if self.steps_in_current_phase < self.min_duration:
-            action = self.current_green
-
-        if self.steps_in_current_phase > self.max_green_duration:
-            action = np.argmax(self.state)
-
-        switched = (action != self.current_green)
-
-        if switched:
-            if self.visualizer and pygame.get_init():
-                while True:
-                    if self.visualizer.is_intersection_clear():
-                        break
-                    self.visualizer.update_physics(green_lane=-1)
-                    if not self.visualizer.draw(active_index=-1):
-                        return None, 0
-                    pygame.event.pump()
-
-            self.current_green = action
-            self.steps_in_current_phase = 0
-        else:
-            self.steps_in_current_phase += 1
-
-        self._random_arrivals()
-
-        # reward system (UNCHANGED)
-        total_queue = sum(self.state)          
-        queue_penalty = - (total_queue / 20.0)   
-
-        wait_penalty = 0.0
-        if self.visualizer:
-            prev_wait = getattr(self, "prev_wait", 0)
-            curr_wait = sum(car.wait_time for lane in self.visualizer.lanes for car in lane)
-            wait_penalty = (prev_wait - curr_wait) / 50.0
-            self.prev_wait = curr_wait
-
-        flow_bonus = 0.2 if self.state[self.current_green] > 0 else 0.0
-        change_penalty = -0.2 if action != self.current_green else 0.0
-
-        reward = queue_penalty + wait_penalty + flow_bonus + change_penalty
-        reward = max(-1.0, min(1.0, reward))
-
-        return self._get_simplified_state(), reward
-
-    def _random_arrivals(self):
-        for i in range(4):
-            if np.random.random() < 0.20: 
-                if len(self.visualizer.lanes[i]) < 20: 
-                    self.visualizer.add_car(i)
-
-    def render(self, action):
-        if self.visualizer and pygame.get_init():
-            self.visualizer.update_physics(green_lane=action)
-            return self.visualizer.draw(active_index=action)
-        return False
+    def update(self):
+        n = self.count
+        self.x[:n] += self.drift_x[:n]
+        self.y[:n] += self.drift_y[:n]
+        self.size[:n] += 0.1
+        self.life[:n] -= 10
+
+        alive = np.flatnonzero(self.life[:n] > 0)
+        if len(alive) < n:
+            # Order-preserving compaction keeps older puffs drawn underneath
+            for arr in (self.x, self.y, self.size, self.life, self.drift_x, self.drift_y):
+                arr[:len(alive)] = arr[alive]
+            self.count = len(alive)
+
+    def __iter__(self):
+        n = self.count
+        return zip(self.x[:n].tolist(), self.y[:n].tolist(), self.size[:n].tolist(), self.life[:n].tolist())
+
+class RenderSchedule:
+    # Decides which sim ticks get drawn: every N ticks, and at most max_fps
+    # frames per wall-clock second. Skipped ticks cost nothing, so the
+    # simulation keeps running at full speed between frames. every_n_steps=0
+    # draws nothing, like TRAIN_RENDER_FPS = 0 in main.py.
+    def __init__(self, every_n_steps=1, max_fps=None, enabled=True):
+        if every_n_steps < 0:
+            raise ValueError("every_n_steps must be 0 (disabled) or more")
+        self.every_n_steps = every_n_steps
+        self.max_fps = max_fps
+        self.enabled = enabled and every_n_steps > 0
+        self.last_frame = 0.0
+
+    def due(self, tick):
+        if not self.enabled or tick % self.every_n_steps:
+            return False
+        if self.max_fps:
+            now = time.perf_counter()
+            if now - self.last_frame < 1.0 / self.max_fps:
+                return False
+            self.last_frame = now
+        return True
 
 class TrafficVisualizer:
-    def __init__(self):
+    def __init__(self, sim=None):
+        # Observes a TrafficSimulation; the physics itself lives in simulation.py
+        self.sim = sim if sim is not None else TrafficSimulation()
+        self.sim.observers.append(self)
         pygame.init()
         self.screen_size = (800, 600)
         self.screen = pygame.display.set_mode(self.screen_size)
@@ -236,14 +195,23 @@ class TrafficVisualizer:
         self.title_font = pygame.font.SysFont("Arial", 28, bold=True)
         self.queue_font = pygame.font.SysFont("Arial", 24, bold=True)
 
-        self.cx, self.cy = 400, 300
-        self.road_w = 140 
-        self.lane_w = self.road_w // 2
-        self.stop_off = self.road_w // 2 + 15
+        self.cx, self.cy = self.sim.cx, self.sim.cy
+        self.road_w = self.sim.road_w
+        self.lane_w = self.sim.lane_w
+        self.stop_off = self.sim.stop_off
 
         self.assets = AssetManager()
-        self.particles = [] 
+        self.particles = ParticlePool()
         self.running = True
+        # Frames are paced to the simulated tick rate unless fast-forwarding
+        self.frame_clock = pygame.time.Clock()
+        self.fast_forward = False
+        # Static scene cache and the screen areas drawn over it last frame
+        self.background = None
+        self.dirty_rects = []
+        self.hud_panel = pygame.Surface((220, 90))
+        self.hud_panel.set_alpha(200); self.hud_panel.fill((0,0,0))
+        self.text_cache = {}
 
         self.colors = {
             'line_white': (220, 220, 220), 'line_yellow': (220, 180, 20),
@@ -266,232 +234,168 @@ class TrafficVisualizer:
                 tx = random.randint(int(x1) + 20, int(x2) - 20)
                 ty = random.randint(int(y1) + 20, int(y2) - 20)
                 self.trees.append((tx, ty))
-        
-        self.lanes = [[], [], [], []] 
-        self.leaving_cars = []
-        self.last_release_time = 0
+
+    @property
+    def lanes(self):
+        return self.sim.lanes
+
+    @property
+    def leaving_cars(self):
+        return self.sim.leaving_cars
 
     def reset_cars(self):
-        self.lanes = [[], [], [], []]
-        self.leaving_cars = []
-        self.particles = []
+        self.sim.reset()
+        self.particles.clear()
 
     def add_car(self, lane_index, instant=False):
-        sprite_index = random.randint(0, 6) 
-        offset = 12 
-        
-        if lane_index == 0: 
-            stop, start, d = self.cy - self.stop_off - 80, (self.cx - self.lane_w//2 - offset, -100), 'down'
-        elif lane_index == 1: 
-            stop, start, d = self.cy + self.stop_off + 20, (self.cx + self.lane_w//2 - offset, 700), 'up'
-        elif lane_index == 2: 
-            stop, start, d = self.cx + self.stop_off + 20, (900, self.cy - self.lane_w//2 - offset), 'left'
-        elif lane_index == 3: 
-            stop, start, d = self.cx - self.stop_off - 80, (-100, self.cy + self.lane_w//2 - offset), 'right'
-
-        if not instant and len(self.lanes[lane_index]) > 0:
-            last_car = self.lanes[lane_index][-1]
-            safe_dist = 110 
-            if d == 'down' and last_car.y < start[1] + safe_dist: return
-            if d == 'up' and last_car.y > start[1] - safe_dist: return
-            if d == 'left' and last_car.x > start[0] - safe_dist: return
-            if d == 'right' and last_car.x < start[0] + safe_dist: return
-
-        car = CarEntity(lane_index, stop, start, d, sprite_index)
-        if instant: 
-            if d=='down': car.y = stop - (len(self.lanes[lane_index]) * GAP_SIZE)
-            elif d=='up': car.y = stop + (len(self.lanes[lane_index]) * GAP_SIZE)
-            elif d=='left': car.x = stop + (len(self.lanes[lane_index]) * GAP_SIZE)
-            elif d=='right': car.x = stop - (len(self.lanes[lane_index]) * GAP_SIZE)
-            car.state = "waiting"
-        self.lanes[lane_index].append(car)
+        self.sim.add_car(lane_index, instant)
 
     def release_car(self, lane_index):
-        if len(self.lanes[lane_index]) > 0:
-            car = self.lanes[lane_index].pop(0)
-            car.state = "leaving"
-            self.leaving_cars.append(car)
-            return True
-        return False
+        return self.sim.release_car(lane_index)
 
     def is_intersection_clear(self):
-        margin = 40 
-        x1 = self.cx - self.road_w//2 - margin
-        x2 = self.cx + self.road_w//2 + margin
-        y1 = self.cy - self.road_w//2 - margin
-        y2 = self.cy + self.road_w//2 + margin
-        
-        for car in self.leaving_cars:
-            if x1 < car.x < x2 and y1 < car.y < y2:
-                return False
-        return True
+        return self.sim.is_intersection_clear()
 
     def update_physics(self, green_lane):
-        cars_released = 0
-        current_time = time.time()
+        return self.sim.update_physics(green_lane)
 
-        for lane_idx, queue in enumerate(self.lanes):
-            for i, car in enumerate(queue):
-                car.update(i) 
-            
-            if lane_idx == green_lane and len(queue) > 0:
-                if not self.is_intersection_clear():
-                    continue 
-
-                first_car = queue[0]
-                
-                # --- SMOOTHNESS UPDATE: Extended Distance & Faster Timer ---
-                dist_to_stop = 0
-                if first_car.direction == 'down': dist_to_stop = first_car.stop_pos_base - first_car.y
-                elif first_car.direction == 'up': dist_to_stop = first_car.y - first_car.stop_pos_base
-                elif first_car.direction == 'left': dist_to_stop = first_car.x - first_car.stop_pos_base
-                elif first_car.direction == 'right': dist_to_stop = first_car.stop_pos_base - first_car.x
-                
-                # Update: Reduced delay from 0.8 to 0.4 seconds for faster release
-                # Update: Increased detection distance from 60 to 100 pixels
-                if current_time - self.last_release_time > 0.4:
-                    if dist_to_stop < 100 or first_car.state == "waiting":
-                        car = queue.pop(0)
-                        car.state = "leaving"
-                        self.leaving_cars.append(car)
-                        self.last_release_time = current_time
-                        cars_released += 1
-
-        for car in self.leaving_cars[:]:
-            car.update(0) 
-            if random.random() < 0.4: self.create_exhaust(car)
-            if not (-300 < car.x < 1100 and -300 < car.y < 900):
-                self.leaving_cars.remove(car)
-
-        for p in self.particles[:]:
-            p.update()
-            if p.life <= 0: self.particles.remove(p)
-            
-        return cars_released
+    def on_physics_update(self, sim):
+        puffing = self.particles.rng.random(len(sim.leaving_cars)) < 0.4
+        spots = [self.exhaust_position(car) for car, puff in zip(sim.leaving_cars, puffing) if puff]
+        if spots:
+            xs, ys = zip(*spots)
+            self.particles.emit(xs, ys)
+        self.particles.update()
 
-    def create_exhaust(self, car):
+    def exhaust_position(self, car):
         ex_x, ex_y = car.x + CAR_WIDTH//2, car.y + CAR_LENGTH//2
         if car.direction == 'up': ex_y = car.y + CAR_LENGTH
         elif car.direction == 'down': ex_y = car.y
         elif car.direction == 'left': ex_x = car.x + CAR_LENGTH
         elif car.direction == 'right': ex_x = car.x
-        self.particles.append(Particle(ex_x, ex_y))
+        return ex_x, ex_y
 
     def draw_cube(self, x, y, w, h, d, top_col, side_col):
         pygame.draw.rect(self.screen, side_col, (x, y + h, w, d)) 
         pygame.draw.rect(self.screen, side_col, (x + w, y, d, h + d)) 
         pygame.draw.rect(self.screen, top_col, (x, y, w, h)) 
         pygame.draw.rect(self.screen, (255,255,255), (x, y, w, h), 1)
+        return pygame.Rect(x, y, w + d, h + d)
 
-    def draw_tree(self, x, y):
-        pygame.draw.ellipse(self.screen, (30, 90, 30), (x-15, y+35, 50, 20))
-        pygame.draw.rect(self.screen, (100, 60, 40), (x, y, 16, 45))
+    def draw_tree(self, surf, x, y):
+        pygame.draw.ellipse(surf, (30, 90, 30), (x-15, y+35, 50, 20))
+        pygame.draw.rect(surf, (100, 60, 40), (x, y, 16, 45))
         leaf_col = (30, 120, 30)
-        pygame.draw.circle(self.screen, leaf_col, (x+8, y-10), 22)
-        pygame.draw.circle(self.screen, leaf_col, (x-5, y+10), 18)
-        pygame.draw.circle(self.screen, leaf_col, (x+20, y+10), 18)
-        pygame.draw.circle(self.screen, (50, 160, 50), (x+5, y-12), 15)
+        pygame.draw.circle(surf, leaf_col, (x+8, y-10), 22)
+        pygame.draw.circle(surf, leaf_col, (x-5, y+10), 18)
+        pygame.draw.circle(surf, leaf_col, (x+20, y+10), 18)
+        pygame.draw.circle(surf, (50, 160, 50), (x+5, y-12), 15)
 
-    def draw_scenery(self):
+    def draw_scenery(self, surf):
         cx, cy, rw = self.cx, self.cy, self.road_w
         if self.assets.images['grass']:
             for x in range(0, 800, 800): 
-                self.screen.blit(self.assets.images['grass'], (x, 0))
+                surf.blit(self.assets.images['grass'], (x, 0))
         else:
-            self.screen.fill((50, 160, 50))
+            surf.fill((50, 160, 50))
         sw_w = rw + 40
-        pygame.draw.rect(self.screen, self.colors['sidewalk'], (0, cy - sw_w//2, 800, sw_w))
-        pygame.draw.rect(self.screen, self.colors['sidewalk'], (cx - sw_w//2, 0, sw_w, 600))
+        pygame.draw.rect(surf, self.colors['sidewalk'], (0, cy - sw_w//2, 800, sw_w))
+        pygame.draw.rect(surf, self.colors['sidewalk'], (cx - sw_w//2, 0, sw_w, 600))
         if self.assets.images['road']:
             tex = pygame.transform.scale(self.assets.images['road'], (800, rw))
             tex_v = pygame.transform.scale(self.assets.images['road'], (rw, 600))
-            self.screen.blit(tex, (0, cy - rw//2))
-            self.screen.blit(tex_v, (cx - rw//2, 0))
+            surf.blit(tex, (0, cy - rw//2))
+            surf.blit(tex_v, (cx - rw//2, 0))
             s = pygame.Surface((rw, rw))
             s.set_alpha(50); s.fill((0,0,0))
-            self.screen.blit(s, (cx - rw//2, cy - rw//2))
+            surf.blit(s, (cx - rw//2, cy - rw//2))
         else:
-            pygame.draw.rect(self.screen, (50, 50, 55), (0, cy - rw//2, 800, rw))
-            pygame.draw.rect(self.screen, (50, 50, 55), (cx - rw//2, 0, rw, 600))
-        pygame.draw.line(self.screen, self.colors['line_yellow'], (0, cy), (cx-rw//2, cy), 3)
-        pygame.draw.line(self.screen, self.colors['line_yellow'], (cx+rw//2, cy), (800, cy), 3)
-        pygame.draw.line(self.screen, self.colors['line_yellow'], (cx, 0), (cx, cy-rw//2), 3)
-        pygame.draw.line(self.screen, self.colors['line_yellow'], (cx, cy+rw//2), (cx, 600), 3)
+            pygame.draw.rect(surf, (50, 50, 55), (0, cy - rw//2, 800, rw))
+            pygame.draw.rect(surf, (50, 50, 55), (cx - rw//2, 0, rw, 600))
+        pygame.draw.line(surf, self.colors['line_yellow'], (0, cy), (cx-rw//2, cy), 3)
+        pygame.draw.line(surf, self.colors['line_yellow'], (cx+rw//2, cy), (800, cy), 3)
+        pygame.draw.line(surf, self.colors['line_yellow'], (cx, 0), (cx, cy-rw//2), 3)
+        pygame.draw.line(surf, self.colors['line_yellow'], (cx, cy+rw//2), (cx, 600), 3)
         off = self.stop_off
-        pygame.draw.line(self.screen, (255,255,255), (cx-rw//2, cy-off), (cx, cy-off), 6) #N
-        pygame.draw.line(self.screen, (255,255,255), (cx, cy+off), (cx+rw//2, cy+off), 6) #S
-        pygame.draw.line(self.screen, (255,255,255), (cx-off, cy), (cx-off, cy+rw//2), 6) #W
-        pygame.draw.line(self.screen, (255,255,255), (cx+off, cy-rw//2), (cx+off, cy), 6) #E
+        pygame.draw.line(surf, (255,255,255), (cx-rw//2, cy-off), (cx, cy-off), 6) #N
+        pygame.draw.line(surf, (255,255,255), (cx, cy+off), (cx+rw//2, cy+off), 6) #S
+        pygame.draw.line(surf, (255,255,255), (cx-off, cy), (cx-off, cy+rw//2), 6) #W
+        pygame.draw.line(surf, (255,255,255), (cx+off, cy-rw//2), (cx+off, cy), 6) #E
         for tx, ty in self.trees:
-            self.draw_tree(tx, ty)
+            self.draw_tree(surf, tx, ty)
+
+    def render_text(self, font, text, color):
+        # Labels repeat (queue counts, phase name), so each is rendered once
+        key = (id(font), text, color)
+        surf = self.text_cache.get(key)
+        if surf is None:
+            surf = font.render(text, True, color)
+            self.text_cache[key] = surf
+        return surf
+
+    def build_background(self):
+        # The static scene only changes on resize, so it is drawn once here
+        # and copied back under whatever moved in draw()
+        self.background = pygame.Surface(self.screen.get_size()).convert()
+        self.draw_scenery(self.background)
+
+    def invalidate_background(self):
+        self.background = None
+        self.dirty_rects = []
 
     def draw_sprite_car(self, car):
         offset_x = CAR_WIDTH // 2
         offset_y = CAR_LENGTH // 2
         if car.direction in ['left', 'right']:
-            shadow_rect = pygame.Rect(car.x, car.y + CAR_WIDTH - 5, CAR_LENGTH, 10)
+            shadow_pos = (car.x, car.y + CAR_WIDTH - 5)
         else:
-            shadow_rect = pygame.Rect(car.x, car.y + CAR_LENGTH - 5, CAR_WIDTH, 10)
-        shadow_surf = pygame.Surface((shadow_rect.width + 10, shadow_rect.height + 10), pygame.SRCALPHA)
-        pygame.draw.ellipse(shadow_surf, (0, 0, 0, 80), (0, 0, shadow_rect.width, shadow_rect.height))
-        self.screen.blit(shadow_surf, (shadow_rect.x, shadow_rect.y))
+            shadow_pos = (car.x, car.y + CAR_LENGTH - 5)
+        area = self.screen.blit(self.assets.shadows[car.direction], shadow_pos)
         sprite = self.assets.get_car_image(car.direction, car.sprite_index)
         if sprite:
             rect = sprite.get_rect(center=(car.x + offset_x, car.y + offset_y)) 
             self.screen.blit(sprite, rect)
-            self.draw_car_lights(car, rect)
-        else:
-            self.draw_fallback_car(car)
+            return area.unionall([rect] + self.draw_car_lights(car, rect))
+        return area.union(self.draw_fallback_car(car))
 
     def draw_car_lights(self, car, rect):
         if car.is_braking:
-            brake_surf = pygame.Surface((10, 10), pygame.SRCALPHA)
-            pygame.draw.circle(brake_surf, (255, 0, 0, 150), (5, 5), 4) 
+            brake = self.assets.brake_light
             if car.direction == 'up':
-                self.screen.blit(brake_surf, (rect.left + 2, rect.bottom - 10))
-                self.screen.blit(brake_surf, (rect.right - 12, rect.bottom - 10))
+                spots = [(rect.left + 2, rect.bottom - 10), (rect.right - 12, rect.bottom - 10)]
             elif car.direction == 'down':
-                self.screen.blit(brake_surf, (rect.left + 2, rect.top))
-                self.screen.blit(brake_surf, (rect.right - 12, rect.top))
-            elif car.direction == 'right':
-                self.screen.blit(brake_surf, (rect.left, rect.top + 2))
-                self.screen.blit(brake_surf, (rect.left, rect.bottom - 12))
-            elif car.direction == 'left':
-                self.screen.blit(brake_surf, (rect.right - 10, rect.top + 2))
-                self.screen.blit(brake_surf, (rect.right - 10, rect.bottom - 12))
-        if not car.is_braking: 
-            beam_len, beam_w = 60, 20
-            beam_surf = pygame.Surface((beam_len, 40), pygame.SRCALPHA)
-            pygame.draw.polygon(beam_surf, (255, 255, 200, 40), [(0, 10), (0, 30), (beam_len, 40), (beam_len, 0)])
-            if car.direction == 'down':
-                rotated_beam = pygame.transform.rotate(beam_surf, -90)
-                self.screen.blit(rotated_beam, (rect.left - 5, rect.bottom))
-                self.screen.blit(rotated_beam, (rect.right - 35, rect.bottom))
-            elif car.direction == 'up':
-                rotated_beam = pygame.transform.rotate(beam_surf, 90)
-                self.screen.blit(rotated_beam, (rect.left - 5, rect.top - beam_len))
-                self.screen.blit(rotated_beam, (rect.right - 35, rect.top - beam_len))
+                spots = [(rect.left + 2, rect.top), (rect.right - 12, rect.top)]
             elif car.direction == 'right':
-                self.screen.blit(beam_surf, (rect.right, rect.top - 5))
-                self.screen.blit(beam_surf, (rect.right, rect.bottom - 35))
+                spots = [(rect.left, rect.top + 2), (rect.left, rect.bottom - 12)]
             elif car.direction == 'left':
-                rotated_beam = pygame.transform.rotate(beam_surf, 180)
-                self.screen.blit(rotated_beam, (rect.left - beam_len, rect.top - 5))
-                self.screen.blit(rotated_beam, (rect.left - beam_len, rect.bottom - 35))
+                spots = [(rect.right - 10, rect.top + 2), (rect.right - 10, rect.bottom - 12)]
+            return [self.screen.blit(brake, pos) for pos in spots]
+
+        beam_len = 60
+        beam = self.assets.beams[car.direction]
+        if car.direction == 'down':
+            spots = [(rect.left - 5, rect.bottom), (rect.right - 35, rect.bottom)]
+        elif car.direction == 'up':
+            spots = [(rect.left - 5, rect.top - beam_len), (rect.right - 35, rect.top - beam_len)]
+        elif car.direction == 'right':
+            spots = [(rect.right, rect.top - 5), (rect.right, rect.bottom - 35)]
+        elif car.direction == 'left':
+            spots = [(rect.left - beam_len, rect.top - 5), (rect.left - beam_len, rect.bottom - 35)]
+        return [self.screen.blit(beam, pos) for pos in spots]
 
     def draw_fallback_car(self, car):
         x, y, d, c = car.x, car.y, car.direction, car.color
         sc = tuple(max(0, val - 40) for val in c)
         if d in ['up', 'down']: w, h, depth = 28, 48, 10
         else: w, h, depth = 48, 28, 10
-        self.draw_cube(x, y, w, h, depth, c, sc)
+        return self.draw_cube(x, y, w, h, depth, c, sc)
 
     def draw_3d_light(self, x, y, state):
         if self.assets.images['traffic_light']:
             sprite = self.assets.images['traffic_light']
             w, h = sprite.get_size()
             screen_x, screen_y = x - w // 2, y - h
-            self.screen.blit(sprite, (screen_x, screen_y))
+            area = self.screen.blit(sprite, (screen_x, screen_y))
             box_top = screen_y + 10
             center_x = x
             spacing = 22 
@@ -499,26 +403,24 @@ class TrafficVisualizer:
             if state == 'red': pygame.draw.circle(self.screen, (255,0,0), (center_x, start_y), 8)
             # Yellow logic is gone.
             if state == 'green': pygame.draw.circle(self.screen, (0,255,0), (center_x, start_y + spacing*2), 8)
+            return area
         else:
             box_x, box_y = x - 14, y - 100
-            self.draw_cube(box_x, box_y, 28, 70, 8, (30,30,30), (10,10,10)) 
+            area = self.draw_cube(box_x, box_y, 28, 70, 8, (30,30,30), (10,10,10))
             r = (255, 50, 50) if state == 'red' else (70, 0, 0)
             g = (50, 255, 50) if state == 'green' else (0, 70, 0)
             
             # Red
             pygame.draw.circle(self.screen, r, (box_x + 14, box_y + 12), 7)
             if r[0] > 100:
-                 s = pygame.Surface((20, 20), pygame.SRCALPHA)
-                 pygame.draw.circle(s, (*r, 50), (10, 10), 9)
-                 self.screen.blit(s, (box_x + 4, box_y + 12 - 9))
+                 self.screen.blit(self.assets.get_glow(r), (box_x + 4, box_y + 12 - 9))
             
             # Green (Position: Bottom)
             py = box_y + 12 + 40 
             pygame.draw.circle(self.screen, g, (box_x + 14, py), 7)
             if g[1] > 100:
-                 s = pygame.Surface((20, 20), pygame.SRCALPHA)
-                 pygame.draw.circle(s, (*g, 50), (10, 10), 9)
-                 self.screen.blit(s, (box_x + 4, py - 9))
+                 self.screen.blit(self.assets.get_glow(g), (box_x + 4, py - 9))
+            return area
 
     def draw(self, active_index): 
         if not pygame.get_init(): return False
@@ -527,11 +429,21 @@ class TrafficVisualizer:
                 self.running = False
                 pygame.quit()
                 return False 
-        self.draw_scenery()
-        for p in self.particles:
-            s = pygame.Surface((p.size*2, p.size*2), pygame.SRCALPHA)
-            pygame.draw.circle(s, (100, 100, 100, p.life), (p.size, p.size), p.size)
-            self.screen.blit(s, (p.x, p.y))
+            if event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE):
+                self.invalidate_background()
+
+        full_redraw = self.background is None
+        if full_redraw:
+            self.build_background()
+            self.screen.blit(self.background, (0, 0))
+        else:
+            # Erase last frame's moving parts by copying the background back
+            for rect in self.dirty_rects:
+                self.screen.blit(self.background, rect, rect)
+
+        drawn = []
+        for x, y, size, life in self.particles:
+            drawn.append(self.screen.blit(self.assets.get_particle_disc(size, life), (x, y)))
         
         states = ['red'] * 4
         if 0 <= active_index <= 3:
@@ -539,31 +451,29 @@ class TrafficVisualizer:
         
         off, cx, cy = self.stop_off, self.cx, self.cy
         
-        self.draw_3d_light(cx - self.lane_w // 2 - 45, cy - off + 45, states[0]) 
-        self.draw_3d_light(cx + self.lane_w // 2 + 47, cy + off + 80, states[1])
-        self.draw_3d_light(cx + off  , cy - self.lane_w // 2 - 10, states[2]) 
-        self.draw_3d_light(cx - off + 5, cy + self.lane_w // 2 + 130, states[3]) 
+        drawn.append(self.draw_3d_light(cx - self.lane_w // 2 - 45, cy - off + 45, states[0]))
+        drawn.append(self.draw_3d_light(cx + self.lane_w // 2 + 47, cy + off + 80, states[1]))
+        drawn.append(self.draw_3d_light(cx + off  , cy - self.lane_w // 2 - 10, states[2]))
+        drawn.append(self.draw_3d_light(cx - off + 5, cy + self.lane_w // 2 + 130, states[3]))
         
         q_counts = [len(l) for l in self.lanes]
-        txt = self.queue_font.render(f"Q: {q_counts[0]}", True, (255, 255, 255))
-        self.screen.blit(txt, (cx - self.lane_w - 70, cy - off - 10))
-        txt = self.queue_font.render(f"Q: {q_counts[1]}", True, (255, 255, 255))
-        self.screen.blit(txt, (cx + self.lane_w + 40, cy + off - 20))
-        txt = self.queue_font.render(f"Q: {q_counts[2]}", True, (255, 255, 255))
-        self.screen.blit(txt, (cx + off + 35, cy - self.lane_w - 25))
-        txt = self.queue_font.render(f"Q: {q_counts[3]}", True, (255, 255, 255))
-        self.screen.blit(txt, (cx - off - 50, cy + self.lane_w - 5))
+        txt = self.render_text(self.queue_font, f"Q: {q_counts[0]}", (255, 255, 255))
+        drawn.append(self.screen.blit(txt, (cx - self.lane_w - 70, cy - off - 10)))
+        txt = self.render_text(self.queue_font, f"Q: {q_counts[1]}", (255, 255, 255))
+        drawn.append(self.screen.blit(txt, (cx + self.lane_w + 40, cy + off - 20)))
+        txt = self.render_text(self.queue_font, f"Q: {q_counts[2]}", (255, 255, 255))
+        drawn.append(self.screen.blit(txt, (cx + off + 35, cy - self.lane_w - 25)))
+        txt = self.render_text(self.queue_font, f"Q: {q_counts[3]}", (255, 255, 255))
+        drawn.append(self.screen.blit(txt, (cx - off - 50, cy + self.lane_w - 5)))
         
         all_cars = []
         for q in self.lanes: all_cars.extend(q)
         all_cars.extend(self.leaving_cars)
         all_cars.sort(key=lambda c: c.y)
         for car in all_cars:
-            self.draw_sprite_car(car)
+            drawn.append(self.draw_sprite_car(car))
         
-        s = pygame.Surface((220, 90))
-        s.set_alpha(200); s.fill((0,0,0))
-        self.screen.blit(s, (10, 10))
+        drawn.append(self.screen.blit(self.hud_panel, (10, 10)))
         
         st_txt = "GREEN" 
         col = (0, 255, 0)
@@ -572,9 +482,16 @@ class TrafficVisualizer:
              col = (255, 50, 50)
 
         total_waiting = sum(len(l) for l in self.lanes)
-        self.screen.blit(self.title_font.render(f"Waiting: {total_waiting}", True, (255,255,255)), (20, 20))
-        self.screen.blit(self.font.render(st_txt, True, col), (20, 60))
-        pygame.display.flip()
+        self.screen.blit(self.render_text(self.title_font, f"Waiting: {total_waiting}", (255,255,255)), (20, 20))
+        self.screen.blit(self.render_text(self.font, st_txt, col), (20, 60))
+
+        if full_redraw:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.dirty_rects + drawn)
+        self.dirty_rects = drawn
+        if not self.fast_forward:
+            self.frame_clock.tick(TICK_RATE)
         return True
 
     def handle_events(self):
@@ -1,14 +1,34 @@
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, ttk
 import os
-import threading
-import main 
+import queue
+import time
+import multiprocessing as mp
+# main (and with it pygame and matplotlib) is only imported in the job process
+
+# Same file as main.CHECKPOINT_FILE; a fresh training run must not resume it
+CHECKPOINT_FILE = "training_checkpoint.pkl"
+POLL_MS = 100
+# How long a cancelled job gets to save its brain before it is terminated
+CANCEL_GRACE_SECONDS = 5.0
+
+def run_job(progress_queue, stop_event, mode):
+    # Runs in a child process, so pygame, matplotlib and training get their own
+    # interpreter and never block the launcher. mode is 'train' or 'watch'
+    # (see main.main), so a leftover checkpoint never turns a watch into training
+    try:
+        import main
+        main.main(progress=progress_queue.put, stop_event=stop_event, mode=mode)
+    except Exception as e:
+        progress_queue.put({'error': str(e)})
+    finally:
+        progress_queue.put({'done': True})
 
 class TrafficLauncher:
     def __init__(self, root):
         self.root = root
         self.root.title("Traffic AI Controller")
-        self.root.geometry("400x400")
+        self.root.geometry("400x560")
         self.root.configure(bg="#f0f0f0")
 
         title_label = tk.Label(root, text="🚦 AI Traffic Control 🚦", 
@@ -38,10 +58,32 @@ class TrafficLauncher:
                                      font=("Segoe UI", 10, "italic"), bg="#f0f0f0", fg="blue")
         self.status_label.pack(side=tk.BOTTOM, pady=10)
 
+        # Live progress of the running job
+        panel = tk.Frame(root, bg="#f0f0f0")
+        panel.pack(pady=5)
+        self.progress_bar = ttk.Progressbar(panel, length=300, mode='determinate')
+        self.progress_bar.pack(pady=5)
+        self.progress_label = tk.Label(panel, text="", font=("Segoe UI", 9), bg="#f0f0f0", fg="#333",
+                                       justify=tk.LEFT)
+        self.progress_label.pack()
+        self.btn_cancel = tk.Button(panel, text="Cancel", command=self.cancel_job,
+                                    font=("Segoe UI", 10), bg="#e0e0e0", width=12, state=tk.DISABLED)
+        self.btn_cancel.pack(pady=5)
+
+        self.ctx = mp.get_context("spawn")
+        self.process = None
+        self.progress_queue = None
+        self.stop_event = None
+        self.cancel_time = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
     def delete_brain(self):
-        if os.path.exists("traffic_brain.pkl"):
+        # The checkpoint holds a copy of the Q-table too, so it goes with the brain
+        existing = [f for f in ("traffic_brain.pkl", CHECKPOINT_FILE) if os.path.exists(f)]
+        if existing:
             try:
-                os.remove("traffic_brain.pkl")
+                for filename in existing:
+                    os.remove(filename)
                 self.status_label.config(text="Status: Brain deleted!")
                 messagebox.showinfo("Success", "The AI brain has been reset.")
             except PermissionError:
@@ -50,44 +92,99 @@ class TrafficLauncher:
             self.status_label.config(text="Status: No brain file found.")
             messagebox.showinfo("Info", "No brain file found to delete.")
 
-    def run_simulation_thread(self):
+    def start_job(self, mode):
         self.status_label.config(text="Status: Simulation Running...")
         
         self.btn_train.config(state=tk.DISABLED)
         self.btn_run.config(state=tk.DISABLED)
         self.btn_reset.config(state=tk.DISABLED)
+        self.btn_cancel.config(state=tk.NORMAL)
+        self.progress_bar.config(value=0)
+        self.progress_label.config(text="Starting...")
+
+        self.progress_queue = self.ctx.Queue()
+        self.stop_event = self.ctx.Event()
+        self.cancel_time = None
+        self.process = self.ctx.Process(target=run_job, args=(self.progress_queue, self.stop_event, mode),
+                                        daemon=True)
+        self.process.start()
+        self.root.after(POLL_MS, self.poll_job)
+
+    def poll_job(self):
+        # Runs on the Tk main loop: drain whatever the job sent since last time
+        done, error = False, None
+        while True:
+            try:
+                msg = self.progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            if 'error' in msg:
+                error = msg['error']
+            elif 'done' in msg:
+                done = True
+            else:
+                self.progress_bar.config(maximum=msg['episodes'], value=msg['episode'])
+                self.progress_label.config(
+                    text=f"Episode {msg['episode']}/{msg['episodes']}   Reward {msg['reward']:.2f}\n"
+                         f"Epsilon {msg['epsilon']:.2f}   {msg['steps_per_sec']:.0f} steps/s")
+
+        if self.cancel_time is not None and time.monotonic() - self.cancel_time > CANCEL_GRACE_SECONDS:
+            self.process.terminate()
+        if done or not self.process.is_alive():
+            self.finish_job(error)
+        else:
+            self.root.after(POLL_MS, self.poll_job)
+
+    def finish_job(self, error=None):
+        self.process.join(timeout=1.0)
+        cancelled = self.cancel_time is not None
+        self.process = None
+        if error:
+            print(f"Error in simulation: {error}")
+            messagebox.showerror("Simulation Error", f"An error occurred:\n{error}")
         
-        try:
-            import importlib
-            importlib.reload(main) 
-            main.main() 
-        except Exception as e:
-            print(f"Error in simulation: {e}")
-            messagebox.showerror("Simulation Error", f"An error occurred:\n{e}")
-        
-        self.status_label.config(text="Status: Finished!")
+        self.status_label.config(text="Status: Cancelled" if cancelled else "Status: Finished!")
         self.btn_train.config(state=tk.NORMAL)
         self.btn_run.config(state=tk.NORMAL)
         self.btn_reset.config(state=tk.NORMAL)
+        self.btn_cancel.config(state=tk.DISABLED)
+
+    def cancel_job(self):
+        if self.process is None or self.cancel_time is not None:
+            return
+        # The job stops at its next step and saves its brain and checkpoint
+        self.stop_event.set()
+        self.cancel_time = time.monotonic()
+        self.status_label.config(text="Status: Cancelling...")
+        self.btn_cancel.config(state=tk.DISABLED)
+
+    def on_close(self):
+        if self.process is not None:
+            self.stop_event.set()
+            self.process.join(timeout=CANCEL_GRACE_SECONDS)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.root.destroy()
 
     def train_new(self):
-        if os.path.exists("traffic_brain.pkl"):
-            try:
-                os.remove("traffic_brain.pkl")
-            except PermissionError:
-                messagebox.showerror("Error", "Close the running simulation first!")
-                return
+        for filename in ("traffic_brain.pkl", CHECKPOINT_FILE):
+            if os.path.exists(filename):
+                try:
+                    os.remove(filename)
+                except PermissionError:
+                    messagebox.showerror("Error", "Close the running simulation first!")
+                    return
         
-        threading.Thread(target=self.run_simulation_thread, daemon=True).start()
+        self.start_job('train')
 
     def run_smart(self):
         if not os.path.exists("traffic_brain.pkl"):
             messagebox.showwarning("Warning", "No trained brain found! \nPlease click 'Train New Agent' first.")
             return
 
-        threading.Thread(target=self.run_simulation_thread, daemon=True).start()
+        self.start_job('watch')
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = TrafficLauncher(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
\ No newline at end of file
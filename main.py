@@ -1,14 +1,41 @@
-import pygame
-import time
 import os
+import time
 import numpy as np 
-import matplotlib.pyplot as plt
-from function import TrafficEnv, TrafficVisualizer
+from collections import deque
+from function import TrafficEnv, TrafficVisualizer, RenderSchedule
 from agent import QLearner
-
-def run_fixed_time(env, steps_per_episode=150, green_duration=60):
+from recorder import EpisodeRecorder
+from profiling import PhaseProfiler, NULL_PROFILER
+from checkpoint import save_checkpoint, load_checkpoint, restore_checkpoint
+from metrics import MetricsWriter, LivePlot, load_episodes, plot_metrics
+
+# Frame budget for the middle training episodes: they are drawn at most this
+# often while the simulation runs at full speed. 0 skips drawing them.
+TRAIN_RENDER_FPS = 30
+# How often (in sim steps) skipped frames still poll the window for events
+EVENT_POLL_STEPS = 60
+# Set to a filename (e.g. "run.rec") to record every step for `python recorder.py run.rec`
+RECORD_FILE = None
+# Set to a filename (.csv or .json) to time each phase of the training steps per episode
+PROFILE_FILE = None
+# Unfinished training runs are checkpointed here every CHECKPOINT_EVERY episodes
+# and picked up again on the next start
+CHECKPOINT_FILE = "training_checkpoint.pkl"
+CHECKPOINT_EVERY = 10
+# Training metrics (per step and per episode) are streamed to this file, so
+# memory stays flat on long runs and a crash keeps everything but the last chunk
+METRICS_FILE = "training_metrics.bin"
+# Rewards kept in memory for the moving average, the checkpoint and the baseline comparison
+REWARD_WINDOW = 20
+# Show the learning graph while training, updated every LIVE_PLOT_EVERY episodes
+LIVE_PLOT = False
+LIVE_PLOT_EVERY = 5
+
+def run_fixed_time(env, steps_per_episode=150, green_duration=60, schedule=None):
     total_reward = 0
     env.reset()
+    schedule = schedule or RenderSchedule(every_n_steps=5)
+    env.render_schedule = schedule
 
     for step in range(steps_per_episode):
         action = (step // green_duration) % 4
@@ -17,22 +44,39 @@ def run_fixed_time(env, steps_per_episode=150, green_duration=60):
             break
         total_reward += reward
 
-        if step % 5 == 0:
+        if schedule.due(env.sim.ticks):
             env.render(action)
-            time.sleep(0.01)
 
     return total_reward
 
 
-def main():
+def main(progress=None, stop_event=None, mode=None):
+    # progress: optional callable given a dict per finished episode (the GUI
+    # streams these from a child process); stop_event: optional Event that
+    # stops the run like Ctrl-C does; mode: 'train' (resume the checkpoint if
+    # there is one, never present) or 'watch' (present the saved brain, leave
+    # the checkpoint alone). None picks from the files on disk as before.
+    if mode not in (None, 'train', 'watch'):
+        raise ValueError(f"unknown mode {mode!r}")
     visualizer = TrafficVisualizer()
     env = TrafficEnv(visualizer)
     
     agent = QLearner(learning_rate=0.01, discount_factor=0.9, exploration_rate=1.0)
 
     is_presenting = False
-    if os.path.exists("traffic_brain.pkl"):
-        agent.load_model("traffic_brain.pkl")
+    start_episode = 0
+    # Only the last REWARD_WINDOW episode rewards; the full history is in METRICS_FILE
+    recent_rewards = deque(maxlen=REWARD_WINDOW)
+    checkpoint = load_checkpoint(CHECKPOINT_FILE) if mode != 'watch' else None
+    if checkpoint:
+        start_episode, restored = restore_checkpoint(checkpoint, agent)
+        recent_rewards.extend(restored)
+        print(f"Resuming training from episode {start_episode + 1} | Epsilon = {agent.epsilon:.2f}")
+        episodes = 200
+    elif mode == 'watch' or (mode is None and os.path.exists("traffic_brain.pkl")):
+        if not agent.load_model("traffic_brain.pkl"):
+            visualizer.close()
+            raise FileNotFoundError("traffic_brain.pkl")
         agent.epsilon = 0.0 
         print("Resuming with smart agent!")
         is_presenting = True 
@@ -40,12 +84,29 @@ def main():
     else:
         print("Starting PURE AI training from scratch...")
         episodes = 200 
+    episodes_done = start_episode
  
     steps_per_episode = 150 
-    rewards_history = []
+
+    recorder = EpisodeRecorder(RECORD_FILE) if RECORD_FILE else None
+    if PROFILE_FILE:
+        env.profiler = PhaseProfiler()
+    prof = env.profiler
+
+    metrics = live_plot = None
+    if METRICS_FILE and not is_presenting:
+        # A resumed run appends; load_metrics keeps the latest copy of re-run episodes
+        metrics = MetricsWriter(METRICS_FILE, window=REWARD_WINDOW, append=bool(checkpoint))
+        for r in recent_rewards:
+            metrics.rolling.add(r)
+        if LIVE_PLOT:
+            live_plot = LivePlot(window=REWARD_WINDOW, every=LIVE_PLOT_EVERY)
+
+    slow_schedule = RenderSchedule()
+    train_schedule = RenderSchedule(max_fps=TRAIN_RENDER_FPS, enabled=TRAIN_RENDER_FPS > 0)
 
     try:
-        for episode in range(episodes):
+        for episode in range(start_episode, episodes):
             env.reset()
             state = env._get_simplified_state() 
             total_reward = 0
@@ -54,12 +115,26 @@ def main():
                 should_slow_down = True
             else:
                 should_slow_down = (episode < 3) or (episode >= (episodes - 3))
+            # Slow episodes draw every step at the simulated tick rate, the
+            # rest fast-forward and only draw what the frame budget allows
+            visualizer.fast_forward = not should_slow_down
+            schedule = slow_schedule if should_slow_down else train_schedule
+            env.render_schedule = schedule
+            if recorder:
+                recorder.start_episode()
+            if metrics:
+                metrics.start_episode(episode + 1)
             
             if is_presenting:
                 print(f"--- Presentation Episode {episode + 1} ---")
+            episode_start = time.perf_counter()
             
             for step in range(steps_per_episode):
+                if stop_event is not None and stop_event.is_set():
+                    raise KeyboardInterrupt
+                t = prof.start()
                 action = agent.choose_action(state, env.current_green)
+                prof.stop('action', t)
                 
                 step_result = env.step(action)
                 if step_result[0] is None: break 
@@ -67,45 +142,85 @@ def main():
                 next_simplified_state, reward = step_result
                 
                 if agent.epsilon > 0:
+                    t = prof.start()
                     agent.update_q_value(state, action, reward, next_simplified_state)
+                    prof.stop('update', t)
                 
                 state = next_simplified_state
                 total_reward += reward
+                if recorder:
+                    recorder.record(env, action, reward)
+                if metrics:
+                    metrics.record_step(env, reward, agent.epsilon)
                 
                 actual_light = env.current_green
                 
-                if should_slow_down:
-                    if not env.render(actual_light): 
-                        print("Simulation stopped by user.")
-                        return 
-                    time.sleep(0.01) 
-                else:
-                    if not env.render(actual_light):
+                if schedule.due(env.sim.ticks):
+                    t = prof.start()
+                    drawn = env.render(actual_light)
+                    prof.stop('render', t)
+                    if not drawn:
                         print("Simulation stopped by user.")
                         return
+                elif env.sim.ticks % EVENT_POLL_STEPS == 0 and not visualizer.handle_events():
+                    print("Simulation stopped by user.")
+                    return
 
             if agent.epsilon > 0.05:
                 agent.epsilon *= 0.99
           
-            rewards_history.append(total_reward)
+            recent_rewards.append(total_reward)
+            episodes_done = episode + 1
+            prof.end_episode(reward=total_reward)
+            if metrics:
+                row = metrics.end_episode(agent.epsilon)
+                if live_plot:
+                    live_plot.update(episode + 1, row['reward'], row['reward_avg'])
+            if progress:
+                progress({'episode': episode + 1, 'episodes': episodes, 'reward': float(total_reward),
+                          'epsilon': agent.epsilon,
+                          'steps_per_sec': (step + 1) / max(time.perf_counter() - episode_start, 1e-9)})
             
             if (episode + 1) % 10 == 0:
                 print(f"Episode {episode + 1}/{episodes}: Reward = {total_reward:.2f} | Epsilon = {agent.epsilon:.2f}")
+            if not is_presenting and (episode + 1) % CHECKPOINT_EVERY == 0:
+                save_checkpoint(CHECKPOINT_FILE, agent, episode + 1, recent_rewards)
 
         agent.save_model("traffic_brain.pkl")
+        if os.path.exists(CHECKPOINT_FILE):
+            os.remove(CHECKPOINT_FILE)
 
     except KeyboardInterrupt:
         print("Stopped manually.")
         agent.save_model("traffic_brain.pkl")
+        if not is_presenting:
+            # The episode in progress is dropped but its Q updates and RNG
+            # draws are kept, so resuming from here is approximate (see checkpoint.py)
+            save_checkpoint(CHECKPOINT_FILE, agent, episodes_done, recent_rewards)
+    finally:
+        if recorder:
+            recorder.close()
+        if metrics:
+            metrics.close()
+        if PROFILE_FILE:
+            prof.summary()
+            prof.save(PROFILE_FILE)
+        # The baseline runs below are not part of the training profile
+        env.profiler = NULL_PROFILER
+
+    if stop_event is not None and stop_event.is_set():
+        visualizer.close()
+        return
     
     #Compare to fixed one baseline with last 5 episode of the agent
     baseline_rewards = []
+    visualizer.fast_forward = False
     for i in range(5):
         r = run_fixed_time(env, steps_per_episode=150, green_duration=60)
         baseline_rewards.append(r)
 
     baseline_avg = np.mean(baseline_rewards)
-    agent_avg = np.mean(rewards_history[-5:]) 
+    agent_avg = np.mean(list(recent_rewards)[-5:]) 
 
     print("\n===== Baseline Comparison =====")
     print(f"Fixed-Time Controller Avg Reward: {baseline_avg:.2f}")
@@ -113,26 +228,20 @@ def main():
     print(f"Improvement: {agent_avg - baseline_avg:.2f}")
 
     visualizer.close()
-    is_presenting = False
     
-    if not is_presenting and len(rewards_history) > 0:
+    # Only a run that wrote metrics has a learning graph to show
+    if metrics is not None:
         print("Generating Learning Graph...")
-        
-        episodes_range = np.arange(1, len(rewards_history) + 1)
-
-        plt.figure(figsize=(10, 5))
-        plt.plot(episodes_range, rewards_history, marker='.', linestyle='-', linewidth=1, label='Reward per Episode')
-
-        if len(rewards_history) >= 20:
-            moving_avg = np.convolve(rewards_history, np.ones(20)/20, mode='valid')
-            plt.plot(episodes_range[19:], moving_avg, linewidth=2, label='20-Ep Moving Avg')
-
-        plt.title('Pure Q-Learning Performance')
-        plt.xlabel('Episode')
-        plt.ylabel('Total Reward (Higher is Better)')
-        plt.legend()
-        plt.grid(True)
-        plt.show()
+        # Only needed here, so starting a run does not pay for importing it
+        import matplotlib.pyplot as plt
+
+        # Read back from the metrics log, which holds the whole run; only the
+        # episode rows are loaded, the per-step chunks are skipped on disk
+        episode_rows = load_episodes(METRICS_FILE)
+        if live_plot:
+            plt.close(live_plot.fig)
+            plt.ioff()
+        plot_metrics(episode_rows, REWARD_WINDOW)
 
         plt.figure(figsize=(6,4))
         plt.bar(['Fixed-Time', 'Q-Learning'], [baseline_avg, agent_avg], color=['orange','green'])
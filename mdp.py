@@ -0,0 +1,220 @@
+import argparse
+import heapq
+import numpy as np
+from agent import QLearner, NUM_STATES, NUM_ACTIONS, encode_states, dense_to_dict
+from training import run_episode
+
+NUM_ROWS = NUM_STATES * NUM_ACTIONS
+
+class TransitionModel:
+    # Empirical P(s' | s, a) and mean reward over the simplified state space.
+    # Row s * NUM_ACTIONS + a holds that pair's next states in CSR layout
+    # (indptr / indices / probs); entry_rows is the row of every entry, so
+    # expected next values are one bincount.
+    def __init__(self, indptr, indices, probs, rewards, counts):
+        self.indptr = indptr
+        self.indices = indices
+        self.probs = probs
+        self.rewards = rewards
+        self.counts = counts
+        self.entry_rows = np.repeat(np.arange(NUM_ROWS), np.diff(indptr))
+        self.seen = counts > 0
+
+        # Only a few hundred of the 21^4 states are ever reached, so the
+        # solvers work on those, renumbered 0..len(states)-1
+        self.states = np.union1d(np.flatnonzero(self.seen) // NUM_ACTIONS, indices)
+        local_states = np.searchsorted(self.states, self.entry_rows // NUM_ACTIONS)
+        self.local_rows = local_states * NUM_ACTIONS + self.entry_rows % NUM_ACTIONS
+        self.local_indices = np.searchsorted(self.states, indices)
+        local = (self.states[:, None] * NUM_ACTIONS + np.arange(NUM_ACTIONS)).ravel()
+        self.local_rewards = rewards[local]
+        self.local_seen = self.seen[local].reshape(-1, NUM_ACTIONS)
+
+    @classmethod
+    def from_arrays(cls, states, actions, rewards, next_states):
+        rows = encode_states(states) * NUM_ACTIONS + np.asarray(actions, dtype=np.int64)
+        cols = encode_states(next_states)
+        pairs, pair_counts = np.unique(rows * NUM_STATES + cols, return_counts=True)
+        entry_rows, indices = np.divmod(pairs, NUM_STATES)
+
+        counts = np.bincount(rows, minlength=NUM_ROWS)
+        indptr = np.zeros(NUM_ROWS + 1, dtype=np.int64)
+        np.cumsum(np.bincount(entry_rows, minlength=NUM_ROWS), out=indptr[1:])
+        probs = pair_counts / counts[entry_rows]
+        reward_sums = np.bincount(rows, weights=np.asarray(rewards, dtype=np.float64), minlength=NUM_ROWS)
+        mean_rewards = reward_sums / np.maximum(counts, 1)
+        return cls(indptr, indices, probs, mean_rewards, counts)
+
+    @classmethod
+    def from_replay_buffer(cls, buffer):
+        n = len(buffer)
+        return cls.from_arrays(buffer.states[:n], buffer.actions[:n], buffer.rewards[:n], buffer.next_states[:n])
+
+    def q_values(self, v, gamma):
+        # Q(s, a) = R(s, a) + gamma * sum_s' P(s' | s, a) V(s') over the reached
+        # states (v indexed like self.states); -inf where (s, a) was never tried
+        expected = np.bincount(self.local_rows, weights=self.probs * v[self.local_indices],
+                               minlength=len(self.local_rewards))
+        q = (self.local_rewards + gamma * expected).reshape(-1, NUM_ACTIONS)
+        q[~self.local_seen] = -np.inf
+        return q
+
+    def expand(self, q, v):
+        # Reached-state arrays back to the full (NUM_STATES, NUM_ACTIONS) layout
+        full_q = np.full((NUM_STATES, NUM_ACTIONS), -np.inf)
+        full_q[self.states] = q
+        full_v = np.zeros(NUM_STATES)
+        full_v[self.states] = v
+        return full_q, full_v
+
+    def save(self, filename="mdp_model.npz"):
+        np.savez_compressed(filename, indptr=self.indptr, indices=self.indices, probs=self.probs,
+                            rewards=self.rewards, counts=self.counts)
+        print(f"Model saved to {filename}")
+
+    @classmethod
+    def load(cls, filename="mdp_model.npz"):
+        data = np.load(filename)
+        return cls(data['indptr'], data['indices'], data['probs'], data['rewards'], data['counts'])
+
+def state_values(q):
+    # States with no tried action are treated as worth 0
+    v = q.max(axis=1)
+    v[np.isneginf(v)] = 0.0
+    return v
+
+def value_iteration(model, gamma=0.9, tol=1e-6, max_iter=10000):
+    v = np.zeros(len(model.states))
+    for i in range(max_iter):
+        q = model.q_values(v, gamma)
+        new_v = state_values(q)
+        delta = np.abs(new_v - v).max()
+        v = new_v
+        if delta < tol:
+            break
+    return (*model.expand(q, v), i + 1)
+
+def prioritized_sweeping(model, gamma=0.9, theta=1e-6, max_updates=1000000):
+    # Bellman backups one state at a time, largest pending change first; a
+    # state's change is pushed to its predecessors weighted by P(s | pred, a)
+    n = len(model.states)
+    v = np.zeros(n)
+    q = model.q_values(v, gamma)
+
+    # Rows of each state's actions, and its predecessors, in the reached-state numbering
+    row_order = np.argsort(model.local_rows, kind='stable')
+    row_ptr = np.searchsorted(model.local_rows[row_order], np.arange(n + 1) * NUM_ACTIONS)
+    order = np.argsort(model.local_indices, kind='stable')
+    pred_states = model.local_rows[order] // NUM_ACTIONS
+    pred_probs = model.probs[order]
+    pred_ptr = np.searchsorted(model.local_indices[order], np.arange(n + 1))
+
+    residual = np.abs(state_values(q) - v)
+    heap = [(-r, int(s)) for s, r in zip(np.flatnonzero(residual > theta), residual[residual > theta])]
+    heapq.heapify(heap)
+    priority = {s: -p for p, s in heap}
+
+    updates = 0
+    while heap and updates < max_updates:
+        p, s = heapq.heappop(heap)
+        if priority.get(s) != -p:
+            continue
+        del priority[s]
+
+        entries = row_order[row_ptr[s]:row_ptr[s + 1]]
+        expected = np.bincount(model.local_rows[entries] - s * NUM_ACTIONS,
+                               weights=model.probs[entries] * v[model.local_indices[entries]],
+                               minlength=NUM_ACTIONS)
+        row = model.local_rewards[s * NUM_ACTIONS:(s + 1) * NUM_ACTIONS] + gamma * expected
+        row[~model.local_seen[s]] = -np.inf
+        q[s] = row
+        new_v = row.max() if np.isfinite(row.max()) else 0.0
+        change = abs(new_v - v[s])
+        v[s] = new_v
+        updates += 1
+
+        for pred, prob in zip(pred_states[pred_ptr[s]:pred_ptr[s + 1]].tolist(),
+                              pred_probs[pred_ptr[s]:pred_ptr[s + 1]].tolist()):
+            prio = gamma * prob * change
+            if prio > theta and prio > priority.get(pred, 0.0):
+                priority[pred] = prio
+                heapq.heappush(heap, (-prio, pred))
+    return (*model.expand(q, v), updates)
+
+def to_q_table(q):
+    # Untried actions get the worst tried value of their state, so the greedy
+    # choice (plus QLearner's green bonus) stays among actions the data covers;
+    # states never seen stay at 0
+    table = q.copy()
+    unseen = np.isneginf(table)
+    worst = np.where(unseen, np.inf, table).min(axis=1)
+    worst[np.isposinf(worst)] = 0.0
+    table[unseen] = np.broadcast_to(worst[:, None], table.shape)[unseen]
+    return table.astype(np.float32)
+
+def to_qlearner(q, dense=True):
+    agent = QLearner(exploration_rate=0.0, dense=dense)
+    table = to_q_table(q)
+    agent.q_table = table if dense else dense_to_dict(table)
+    return agent
+
+def collect_transitions(env, steps=50000, steps_per_episode=150, seed=0):
+    # Uniformly random actions, so every (state, action) the env reaches gets tried
+    np.random.seed(seed)
+    policy = np.random.RandomState(seed)
+    states, actions, rewards, next_states = [], [], [], []
+    state = env.reset()
+    for step in range(steps):
+        if step % steps_per_episode == 0 and step:
+            state = env.reset()
+        action = int(policy.randint(NUM_ACTIONS))
+        next_state, reward = env.step(action)
+        states.append(state)
+        actions.append(action)
+        rewards.append(reward)
+        next_states.append(next_state)
+        state = next_state
+    return np.array(states), np.array(actions), np.array(rewards), np.array(next_states)
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit a tabular MDP to simulated transitions and solve it")
+    parser.add_argument('--env', choices=['pixel', 'queue'], default='queue', help="simulator to sample from")
+    parser.add_argument('--steps', type=int, default=200000)
+    parser.add_argument('--gamma', type=float, default=0.9)
+    parser.add_argument('--method', choices=['value', 'sweep'], default='value')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dense', action='store_true', help="save a .npy table instead of the pickle")
+    parser.add_argument('--model', help="also save the estimated model to this .npz")
+    parser.add_argument('--out', default="traffic_brain.pkl")
+    parser.add_argument('--eval-episodes', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.env == 'queue':
+        from queue_env import QueueTrafficEnv
+        env = QueueTrafficEnv()
+    else:
+        from simulation import TrafficEnv
+        env = TrafficEnv()
+
+    print(f"Sampling {args.steps} transitions from the {args.env} simulator...")
+    model = TransitionModel.from_arrays(*collect_transitions(env, args.steps, seed=args.seed))
+    print(f"{int(model.seen.sum())} (state, action) pairs, {len(model.probs)} transitions")
+    if args.model:
+        model.save(args.model)
+
+    if args.method == 'value':
+        q, v, iters = value_iteration(model, args.gamma)
+        print(f"Value iteration converged in {iters} sweeps")
+    else:
+        q, v, iters = prioritized_sweeping(model, args.gamma)
+        print(f"Prioritized sweeping finished after {iters} backups")
+
+    agent = to_qlearner(q, args.dense)
+    agent.save_model(args.out)
+
+    rewards = [run_episode(env, agent) for _ in range(args.eval_episodes)]
+    print(f"Greedy policy Avg Reward over {args.eval_episodes} episodes: {np.mean(rewards):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import argparse
+import math
+from collections import deque
+import numpy as np
+from simulation import TICK_RATE
+
+STEP_DTYPE = np.dtype([
+    ('episode', np.int32), ('step', np.int32), ('reward', np.float32), ('queues', np.int16, (4,)),
+    ('wait', np.float32), ('switched', np.bool_), ('epsilon', np.float32),
+])
+EPISODE_DTYPE = np.dtype([
+    ('episode', np.int32), ('steps', np.int32), ('reward', np.float32), ('reward_avg', np.float32),
+    ('queue', np.float32), ('wait', np.float32), ('switches', np.int32), ('epsilon', np.float32),
+])
+
+class RollingStats:
+    # Mean and std of the last `window` values, plus count / mean / best of
+    # everything seen, all kept as running sums so add() is O(1)
+    def __init__(self, window=20):
+        self.values = deque(maxlen=window)
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.count = 0
+        self.total = 0.0
+        self.best = -math.inf
+
+    def add(self, x):
+        x = float(x)
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            self.sum -= old
+            self.sum_sq -= old * old
+        self.values.append(x)
+        self.sum += x
+        self.sum_sq += x * x
+        self.count += 1
+        self.total += x
+        self.best = max(self.best, x)
+
+    @property
+    def full(self):
+        return len(self.values) == self.values.maxlen
+
+    @property
+    def mean(self):
+        return self.sum / len(self.values) if self.values else 0.0
+
+    @property
+    def std(self):
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        return math.sqrt(max(0.0, (self.sum_sq - self.sum * self.sum / n) / (n - 1)))
+
+    @property
+    def overall_mean(self):
+        return self.total / self.count if self.count else 0.0
+
+class MetricsWriter:
+    # Append-only metrics log: one STEP_DTYPE row per env step and one
+    # EPISODE_DTYPE row per finished episode, written as pairs of np.save
+    # chunks (like recorder.EpisodeRecorder), so memory stays bounded by
+    # chunk_size and a crash only loses the unflushed chunk.
+    def __init__(self, filename, chunk_size=1024, window=20, append=False):
+        self.file = open(filename, 'ab' if append else 'wb')
+        self.chunk_size = chunk_size
+        self.rolling = RollingStats(window)
+        self.steps = []
+        self.episodes = []
+        self.episode = 0
+        self._clear()
+
+    def _clear(self):
+        self.step = 0
+        self.reward = 0.0
+        self.queued = 0
+        self.waited = 0.0
+        self.switches = 0
+
+    def start_episode(self, episode):
+        self.episode = episode
+        self._clear()
+
+    def record_step(self, env, reward, epsilon):
+        # Call after env.step(); a phase change resets steps_in_current_phase
+        queues = env.state
+        wait = env.prev_wait / TICK_RATE
+        switched = env.steps_in_current_phase == 0
+        self.steps.append((self.episode, self.step, reward, queues, wait, switched, epsilon))
+        self.step += 1
+        self.reward += reward
+        self.queued += int(queues.sum())
+        self.waited += wait
+        self.switches += switched
+        if len(self.steps) >= self.chunk_size:
+            self.flush()
+
+    def end_episode(self, epsilon):
+        self.rolling.add(self.reward)
+        steps = max(self.step, 1)
+        row = (self.episode, self.step, self.reward, self.rolling.mean,
+               self.queued / steps, self.waited / steps, self.switches, epsilon)
+        self.episodes.append(row)
+        return dict(zip(EPISODE_DTYPE.names, row))
+
+    def flush(self):
+        if not self.steps and not self.episodes:
+            return
+        np.save(self.file, np.array(self.steps, dtype=STEP_DTYPE))
+        np.save(self.file, np.array(self.episodes, dtype=EPISODE_DTYPE))
+        self.file.flush()
+        self.steps = []
+        self.episodes = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def skip_array(f):
+    # Moves past one np.save array by reading only its header
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+    f.seek(math.prod(shape) * dtype.itemsize, 1)
+
+def read_chunks(f, steps=True):
+    # Yields (steps, episodes) chunk pairs from the current position of an
+    # open metrics file; stops at the end or at a half-written last chunk.
+    # With steps=False the step chunks are skipped, not read, and yielded as None.
+    while True:
+        start = f.tell()
+        try:
+            if steps:
+                step_rows = np.load(f)
+            else:
+                skip_array(f)
+                step_rows = None
+            episodes = np.load(f)
+        except (EOFError, ValueError):
+            f.seek(start)
+            return
+        yield step_rows, episodes
+
+def latest(rows, keys):
+    # A resumed run records again the episodes after its checkpoint; keep
+    # the last copy of each key, in file order
+    _, index = np.unique(keys[::-1], return_index=True)
+    return rows[np.sort(len(rows) - 1 - index)]
+
+def load_episodes(filename):
+    # The episode rows only; memory grows with the number of episodes, not steps
+    chunks = []
+    with open(filename, 'rb') as f:
+        for _, episodes in read_chunks(f, steps=False):
+            chunks.append(episodes)
+    episodes = np.concatenate(chunks) if chunks else np.zeros(0, dtype=EPISODE_DTYPE)
+    return latest(episodes, episodes['episode'])
+
+def load_metrics(filename):
+    step_chunks, episode_chunks = [], []
+    with open(filename, 'rb') as f:
+        for steps, episodes in read_chunks(f):
+            step_chunks.append(steps)
+            episode_chunks.append(episodes)
+    steps = np.concatenate(step_chunks) if step_chunks else np.zeros(0, dtype=STEP_DTYPE)
+    episodes = np.concatenate(episode_chunks) if episode_chunks else np.zeros(0, dtype=EPISODE_DTYPE)
+    steps = latest(steps, steps['episode'].astype(np.int64) << 32 | steps['step'])
+    episodes = latest(episodes, episodes['episode'])
+    return steps, episodes
+
+class LivePlot:
+    # Reward per episode and its rolling mean in an interactive window,
+    # redrawn every `every` updates. Past max_points every other point is
+    # dropped, so long runs keep a bounded, progressively coarser history and
+    # a redraw never costs more than max_points points per line.
+    def __init__(self, title='Pure Q-Learning Performance', window=20, max_points=2000, every=1):
+        import matplotlib.pyplot as plt
+        self.plt = plt
+        plt.ion()
+        self.fig, self.ax = plt.subplots(figsize=(10, 5))
+        self.reward_line, = self.ax.plot([], [], marker='.', linestyle='-', linewidth=1, label='Reward per Episode')
+        self.avg_line, = self.ax.plot([], [], linewidth=2, label=f'{window}-Ep Moving Avg')
+        self.ax.set_title(title)
+        self.ax.set_xlabel('Episode')
+        self.ax.set_ylabel('Total Reward (Higher is Better)')
+        self.ax.legend()
+        self.ax.grid(True)
+        self.window = window
+        self.max_points = max_points
+        self.every = every
+        self.updates = 0
+        self.x, self.y, self.avg_x, self.avg = [], [], [], []
+
+    def update(self, episode, reward, reward_avg):
+        self.x.append(episode)
+        self.y.append(reward)
+        if episode >= self.window:
+            self.avg_x.append(episode)
+            self.avg.append(reward_avg)
+        if len(self.x) > self.max_points:
+            self.x, self.y = self.x[::2], self.y[::2]
+        if len(self.avg_x) > self.max_points:
+            self.avg_x, self.avg = self.avg_x[::2], self.avg[::2]
+
+        self.updates += 1
+        if self.updates % self.every == 0:
+            self.draw()
+
+    def draw(self):
+        self.reward_line.set_data(self.x, self.y)
+        self.avg_line.set_data(self.avg_x, self.avg)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.fig.canvas.draw_idle()
+        self.fig.canvas.flush_events()
+
+    def show(self):
+        self.draw()
+        self.plt.ioff()
+        self.plt.show()
+
+def plot_metrics(episodes, window=20, filename=None):
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(10, 5))
+    plt.plot(episodes['episode'], episodes['reward'], marker='.', linestyle='-', linewidth=1,
+             label='Reward per Episode')
+    # reward_avg was kept up to date while training; plot it once the window is full
+    full = episodes['episode'] >= window
+    plt.plot(episodes['episode'][full], episodes['reward_avg'][full], linewidth=2, label=f'{window}-Ep Moving Avg')
+    plt.title('Pure Q-Learning Performance')
+    plt.xlabel('Episode')
+    plt.ylabel('Total Reward (Higher is Better)')
+    plt.legend()
+    plt.grid(True)
+    if filename:
+        plt.savefig(filename)
+        print(f"Learning graph saved to {filename}")
+    else:
+        plt.show()
+
+def follow(filename, poll=1.0, window=20):
+    # Live plot of a run writing to `filename`, reading only the chunks
+    # added since the last poll
+    plot = LivePlot(window=window)
+    with open(filename, 'rb') as f:
+        try:
+            while plot.plt.fignum_exists(plot.fig.number):
+                for _, episodes in read_chunks(f, steps=False):
+                    for row in episodes:
+                        plot.update(int(row['episode']), float(row['reward']), float(row['reward_avg']))
+                plot.plt.pause(poll)
+        except KeyboardInterrupt:
+            print("Stopped manually.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise or plot a training metrics log")
+    parser.add_argument('metrics', nargs='?', default="training_metrics.bin")
+    parser.add_argument('--follow', action='store_true', help="live plot a run that is still writing")
+    parser.add_argument('--plot', nargs='?', const='', help="plot the learning graph, or save it to this file")
+    parser.add_argument('--window', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.follow:
+        follow(args.metrics, window=args.window)
+        return
+
+    steps, episodes = load_metrics(args.metrics)
+    print(f"{len(episodes)} episodes, {len(steps)} steps in {args.metrics}")
+    if len(episodes):
+        last = episodes[-args.window:]
+        print(f"Last-{len(last)} Avg Reward = {last['reward'].mean():.2f} | Best = {episodes['reward'].max():.2f} "
+              f"| Avg Queue = {last['queue'].mean():.2f} | Avg Wait = {last['wait'].mean():.2f}s "
+              f"| Switches/Episode = {last['switches'].mean():.1f} | Epsilon = {last['epsilon'][-1]:.2f}")
+    if args.plot is not None and len(episodes):
+        plot_metrics(episodes, args.window, args.plot or None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import argparse
+import time
+import numpy as np
+from simulation import MAX_QUEUE, ARRIVAL_PROB
+from vec_env import VecTrafficEnv
+from agent import QLearner
+
+# Where a car leaving on each lane carries straight on to: (row step, col step).
+# Lane 0 drives down, 1 up, 2 left, 3 right, and keeps its lane at the next junction.
+LANE_HEADING = [(1, 0), (-1, 0), (0, -1), (0, 1)]
+# Steps a car spends on the link between leaving one junction's clearance box
+# and reaching the next junction's spawn point (one physics tick per step,
+# half a second at TICK_RATE, outside all-red clearance)
+LINK_TICKS = 30
+
+class TrafficNetwork(VecTrafficEnv):
+    # A rows x cols grid of junctions (rows=1 is a corridor) stepped as one
+    # VecTrafficEnv, junction j = row * cols + col. Only lanes on the edge of
+    # the grid get random arrivals. A car leaves its junction as soon as it is
+    # past the clearance box, drives the link for link_ticks steps and then
+    # spawns into the next junction's inbound lane as soon as the spawn point
+    # is free. Cars driving off the edge of the grid leave the network.
+    def __init__(self, rows, cols, seed=None, arrival_prob=ARRIVAL_PROB, link_ticks=LINK_TICKS):
+        if link_ticks < 1:
+            raise ValueError("link_ticks must be at least 1")
+        self.rows, self.cols = rows, cols
+        n = rows * cols
+        r, c = np.divmod(np.arange(n), cols)
+        self.downstream = np.full((n, 4), -1, dtype=np.int64)
+        for lane, (dr, dc) in enumerate(LANE_HEADING):
+            nr, nc = r + dr, c + dc
+            inside = (nr >= 0) & (nr < rows) & (nc >= 0) & (nc < cols)
+            self.downstream[inside, lane] = (nr * cols + nc)[inside]
+
+        # An inbound lane is fed from outside the network if nothing upstream feeds it
+        fed = np.zeros((n, 4), dtype=bool)
+        for lane in range(4):
+            fed[self.downstream[:, lane][self.downstream[:, lane] >= 0], lane] = True
+        self.boundary = ~fed
+
+        # Cars driving the link into (junction, lane), one row per step of
+        # travel time, and cars at the end of it waiting for the spawn point
+        self.link_ticks = link_ticks
+        self.link = np.zeros((link_ticks, n, 4), dtype=np.int32)
+        self.pending = np.zeros((n, 4), dtype=np.int32)
+        self.steps = 0
+        self.throughput = 0
+        super().__init__(n, seed=seed, arrival_prob=np.where(self.boundary, arrival_prob, 0.0))
+        # The rest of the road belongs to the link, so drop cars once they are past the box
+        self.exit = self.box_hi.copy()
+
+    def reset(self):
+        self.link[:] = 0
+        self.pending[:] = 0
+        self.steps = 0
+        self.throughput = 0
+        return super().reset()
+
+    def _random_arrivals(self):
+        rows = np.arange(self.num_envs)[:, None]
+        lanes = np.arange(4)[None, :]
+        last = self.q_pos[rows, lanes, np.maximum(self.q_count - 1, 0)]
+        safe = ((self.q_count == 0) | (last >= 110)) & (self.q_count < MAX_QUEUE)
+        # Internal lanes have arrival_prob 0, so only boundary lanes draw new cars
+        external = self.rng.random((self.num_envs, 4)) < self.arrival_prob
+        handover = self.pending > 0
+        arrive = (external | handover) & safe
+        self.pending -= arrive & handover
+        self._spawn(arrive)
+
+    def step(self, actions):
+        states, rewards = super().step(actions)
+        # Cars that entered their link link_ticks steps ago reach the next
+        # junction; the ones that cleared a junction this step take their place
+        arriving = self.link[self.steps % self.link_ticks]
+        self.pending += arriving
+        arriving[:] = 0
+        exited = self.exited
+        inside = self.downstream >= 0
+        np.add.at(arriving, (self.downstream[inside], np.nonzero(inside)[1]), exited[inside])
+        self.throughput += int(exited[~inside].sum())
+        self.steps += 1
+        return states, rewards
+
+def run_network_episode(net, agents, steps_per_episode=150):
+    # One agent per junction; returns each junction's total reward
+    states = net.reset()
+    total_rewards = np.zeros(net.num_envs)
+    for step in range(steps_per_episode):
+        greens = net.current_green.tolist()
+        state_tuples = [tuple(s) for s in states.tolist()]
+        actions = [agent.choose_action(s, g) for agent, s, g in zip(agents, state_tuples, greens)]
+
+        next_states, rewards = net.step(actions)
+        next_tuples = [tuple(s) for s in next_states.tolist()]
+        for agent, s, a, r, ns in zip(agents, state_tuples, actions, rewards.tolist(), next_tuples):
+            if agent.epsilon > 0:
+                agent.update_q_value(s, a, r, ns)
+
+        states = next_states
+        total_rewards += rewards
+    return total_rewards
+
+def main():
+    parser = argparse.ArgumentParser(description="Train one Q-learning agent per junction of a road network")
+    parser.add_argument('--rows', type=int, default=1)
+    parser.add_argument('--cols', type=int, default=10, help="rows=1 gives a corridor")
+    parser.add_argument('--episodes', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=150)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    np.random.seed(args.seed)
+    net = TrafficNetwork(args.rows, args.cols, seed=args.seed)
+    agents = [QLearner(learning_rate=0.01, discount_factor=0.9, exploration_rate=1.0) for _ in range(net.num_envs)]
+    print(f"Training {net.num_envs} junctions ({args.rows}x{args.cols})...")
+
+    start = time.perf_counter()
+    for episode in range(args.episodes):
+        rewards = run_network_episode(net, agents, args.steps)
+        for agent in agents:
+            if agent.epsilon > 0.05:
+                agent.epsilon *= 0.99
+        if (episode + 1) % 10 == 0:
+            print(f"Episode {episode + 1}/{args.episodes}: Avg Junction Reward = {rewards.mean():.2f} "
+                  f"| Cars Through = {net.throughput} | Epsilon = {agents[0].epsilon:.2f}")
+
+    elapsed = time.perf_counter() - start
+    print(f"{args.episodes * args.steps * net.num_envs / elapsed:.0f} junction-steps/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import os
+import queue
+import random
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from simulation import TrafficEnv
+from agent import QLearner, NUM_STATES, NUM_ACTIONS, encode_state, dense_to_dict
+from training import run_episode, epsilon_at
+
+TABLE_SHAPE = (NUM_STATES, NUM_ACTIONS)
+TABLE_BYTES = NUM_STATES * NUM_ACTIONS * np.dtype(np.float32).itemsize
+
+class SharedQLearner(QLearner):
+    # Dense QLearner whose table lives in shared memory. Updates take the lock
+    # of the state's stripe; with no locks they are applied lock-free.
+    def __init__(self, q_table, locks, learning_rate=0.01, discount_factor=0.9, exploration_rate=1.0):
+        # dense=False only skips allocating a private table we would throw away
+        super().__init__(learning_rate, discount_factor, exploration_rate, dense=False)
+        self.dense = True
+        self.q_table = q_table
+        self.locks = locks
+
+    def update_q_value(self, state, action, reward, next_state):
+        if not self.locks:
+            return super().update_q_value(state, action, reward, next_state)
+        with self.locks[encode_state(state) % len(self.locks)]:
+            super().update_q_value(state, action, reward, next_state)
+
+def actor(worker_id, shm_name, locks, episode_counter, config, results):
+    np.random.seed(config['seed'] + worker_id)
+    random.seed(config['seed'] + worker_id)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        table = np.ndarray(TABLE_SHAPE, dtype=np.float32, buffer=shm.buf)
+        agent = SharedQLearner(table, locks, config['learning_rate'], config['discount_factor'])
+        env = TrafficEnv()
+
+        while True:
+            # Episodes are handed out from one counter so epsilon follows the
+            # same schedule as a single learner, whichever actor runs them
+            with episode_counter.get_lock():
+                episode = episode_counter.value
+                if episode >= config['episodes']: break
+                episode_counter.value += 1
+
+            agent.epsilon = epsilon_at(episode, config['exploration_rate'],
+                                       config['epsilon_decay'], config['epsilon_min'])
+            reward = run_episode(env, agent, config['steps_per_episode'])
+            results.put((episode, reward))
+
+        del agent, table
+    finally:
+        shm.close()
+
+def train_parallel(episodes=200, steps_per_episode=150, workers=None, learning_rate=0.01, discount_factor=0.9,
+                   exploration_rate=1.0, epsilon_decay=0.99, epsilon_min=0.05, lock_stripes=64, seed=0):
+    workers = workers or os.cpu_count()
+    config = {'episodes': episodes, 'steps_per_episode': steps_per_episode, 'learning_rate': learning_rate,
+              'discount_factor': discount_factor, 'exploration_rate': exploration_rate,
+              'epsilon_decay': epsilon_decay, 'epsilon_min': epsilon_min, 'seed': seed}
+
+    shm = shared_memory.SharedMemory(create=True, size=TABLE_BYTES)
+    try:
+        table = np.ndarray(TABLE_SHAPE, dtype=np.float32, buffer=shm.buf)
+        table[:] = 0.0
+
+        locks = [mp.Lock() for _ in range(lock_stripes)]
+        episode_counter = mp.Value('i', 0)
+        results = mp.Queue()
+        procs = [mp.Process(target=actor, args=(i, shm.name, locks, episode_counter, config, results))
+                 for i in range(workers)]
+        for p in procs:
+            p.start()
+
+        rewards_history = [None] * episodes
+        done = 0
+        while done < episodes:
+            try:
+                episode, reward = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(p.is_alive() for p in procs):
+                    print("All actors exited early.")
+                    break
+                continue
+            rewards_history[episode] = reward
+            done += 1
+            if done % 10 == 0:
+                print(f"Episodes done {done}/{episodes}: Reward = {reward:.2f} "
+                      f"| Epsilon = {epsilon_at(episode, exploration_rate, epsilon_decay, epsilon_min):.2f}")
+
+        for p in procs:
+            p.join()
+
+        q_table = table.copy()
+        del table
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return q_table, [r for r in rewards_history if r is not None]
+
+def main():
+    parser = argparse.ArgumentParser(description="Train one Q-table with several actor processes")
+    parser.add_argument('--episodes', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=150)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--locks', type=int, default=64, help="lock stripes, 0 for lock-free updates")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dense', action='store_true', help="save a .npy table instead of the pickle")
+    parser.add_argument('--out', default="traffic_brain.pkl")
+    args = parser.parse_args()
+
+    q_table, rewards_history = train_parallel(args.episodes, args.steps, args.workers,
+                                              lock_stripes=args.locks, seed=args.seed)
+
+    agent = QLearner(dense=args.dense)
+    agent.q_table = q_table if args.dense else dense_to_dict(q_table)
+    agent.save_model(args.out)
+    if rewards_history:
+        print(f"Last-20 Avg Reward = {np.mean(rewards_history[-20:]):.2f}")
+
+
+if __name__ == "__main__":
+    main()
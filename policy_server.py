@@ -0,0 +1,118 @@
+import argparse
+import http.client
+import json
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from agent import QLearner, NUM_LEVELS, NUM_ACTIONS, encode_states, greedy_actions
+
+# Binary protocol: the request body is little-endian int16 rows of
+# (queue0, queue1, queue2, queue3, current_green); the reply is one int8 action per row
+REQUEST_DTYPE = np.dtype('<i2')
+ROW_WIDTH = 5
+
+class PolicyTable:
+    # A trained brain loaded once as a dense table; actions() answers a whole
+    # batch with one gather and the same green bonus as QLearner.choose_action
+    def __init__(self, filename="traffic_brain.pkl"):
+        agent = QLearner(dense=True)
+        if not agent.load_model(filename, mmap_mode='r'):
+            raise FileNotFoundError(filename)
+        self.q_table = agent.q_table
+
+    def actions(self, states, greens):
+        states = np.clip(np.asarray(states, dtype=np.int64).reshape(-1, 4), 0, NUM_LEVELS - 1)
+        greens = np.asarray(greens, dtype=np.int64).reshape(-1)
+        if len(greens) != len(states):
+            raise ValueError("need one current_green per state")
+        if len(greens) and (greens.min() < 0 or greens.max() >= NUM_ACTIONS):
+            raise ValueError(f"current_green must be in 0..{NUM_ACTIONS - 1}")
+        return greedy_actions(self.q_table[encode_states(states)], greens)
+
+class PolicyHandler(BaseHTTPRequestHandler):
+    # POST /act      JSON {"states": [[q0, q1, q2, q3], ...], "greens": [g, ...]} -> {"actions": [...]}
+    # POST /act.bin  binary rows, see REQUEST_DTYPE
+    # GET  /health
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, Nagle plus
+    # delayed ACKs add ~40ms to every keep-alive reply
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def reply_json(self, status, obj):
+        self.reply(status, json.dumps(obj).encode(), "application/json")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.reply_json(200, {'status': 'ok', 'states': len(self.server.policy.q_table)})
+        else:
+            self.reply_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            if self.path == "/act.bin":
+                rows = np.frombuffer(body, dtype=REQUEST_DTYPE).reshape(-1, ROW_WIDTH)
+                actions = self.server.policy.actions(rows[:, :4], rows[:, 4])
+                self.reply(200, actions.astype(np.int8).tobytes(), "application/octet-stream")
+            elif self.path == "/act":
+                request = json.loads(body)
+                actions = self.server.policy.actions(request['states'], request['greens'])
+                self.reply_json(200, {'actions': actions.tolist()})
+            else:
+                self.reply_json(404, {'error': 'not found'})
+        except (ValueError, KeyError, TypeError) as e:
+            self.reply_json(400, {'error': str(e)})
+
+def make_server(filename="traffic_brain.pkl", host="127.0.0.1", port=8765):
+    server = ThreadingHTTPServer((host, port), PolicyHandler)
+    server.policy = PolicyTable(filename)
+    return server
+
+class PolicyClient:
+    # Keeps one connection open and uses the binary endpoint
+    def __init__(self, host="127.0.0.1", port=8765):
+        self.conn = http.client.HTTPConnection(host, port)
+
+    def act(self, states, greens):
+        rows = np.empty((len(greens), ROW_WIDTH), dtype=REQUEST_DTYPE)
+        rows[:, :4] = states
+        rows[:, 4] = greens
+        self.conn.request("POST", "/act.bin", body=rows.tobytes(),
+                          headers={"Content-Type": "application/octet-stream"})
+        response = self.conn.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise RuntimeError(json.loads(body)['error'])
+        return np.frombuffer(body, dtype=np.int8)
+
+    def close(self):
+        self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a trained brain's greedy actions over localhost HTTP")
+    parser.add_argument('--brain', default="traffic_brain.pkl")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = make_server(args.brain, args.host, args.port)
+    print(f"Serving {args.brain} on http://{args.host}:{args.port} (POST /act, /act.bin)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped manually.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
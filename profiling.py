@@ -0,0 +1,105 @@
+import csv
+import json
+import time
+
+# Phases timed by TrafficEnv.step and the training loops
+PHASES = ['action', 'update', 'arrivals', 'clearance', 'physics', 'render']
+COUNTERS = ['steps', 'switches', 'clearance_frames', 'cars_released']
+
+class PhaseProfiler:
+    # Accumulates wall time per phase and event counters, closed off into one
+    # row per episode. Use as: t = prof.start(); ...; prof.stop('physics', t)
+    enabled = True
+
+    def __init__(self):
+        self.episodes = []
+        self._clear()
+
+    def _clear(self):
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        # Set by the first start() so idle time before an episode is not counted
+        self.episode_start = None
+
+    def start(self):
+        now = time.perf_counter()
+        if self.episode_start is None:
+            self.episode_start = now
+        return now
+
+    def stop(self, phase, start):
+        self.times[phase] += time.perf_counter() - start
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+
+    def end_episode(self, **extra):
+        wall = time.perf_counter() - (self.episode_start or time.perf_counter())
+        row = {'episode': len(self.episodes) + 1, 'wall': wall}
+        row.update({f"{p}_s": t for p, t in self.times.items()})
+        # Time spent outside the instrumented phases (loop overhead, logging, ...)
+        row['other_s'] = max(0.0, wall - sum(self.times.values()))
+        row.update(self.counts)
+        row.update(extra)
+        self.episodes.append(row)
+        self._clear()
+        return row
+
+    def totals(self):
+        totals = {}
+        for row in self.episodes:
+            for key, value in row.items():
+                if key != 'episode' and isinstance(value, (int, float)):
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def summary(self):
+        totals = self.totals()
+        wall = totals.get('wall', 0.0)
+        print(f"\n===== Profile ({len(self.episodes)} episodes, {wall:.2f}s) =====")
+        for phase in PHASES + ['other']:
+            t = totals.get(f"{phase}_s", 0.0)
+            share = t / wall if wall else 0.0
+            print(f"{phase:<18}{t:>10.3f}s {share:>7.1%}")
+        for name in COUNTERS:
+            print(f"{name:<18}{totals.get(name, 0):>10}")
+
+    def to_csv(self, filename):
+        if not self.episodes:
+            return
+        fields = list(self.episodes[0])
+        with open(filename, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(self.episodes)
+        print(f"Profile saved to {filename}")
+
+    def to_json(self, filename):
+        with open(filename, 'w') as f:
+            json.dump({'totals': self.totals(), 'episodes': self.episodes}, f, indent=2)
+        print(f"Profile saved to {filename}")
+
+    def save(self, filename):
+        if filename.endswith(".csv"):
+            self.to_csv(filename)
+        else:
+            self.to_json(filename)
+
+class NullProfiler:
+    # Default for every env: same interface, does nothing
+    enabled = False
+    episodes = []
+
+    def start(self):
+        return 0.0
+
+    def stop(self, phase, start):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def end_episode(self, **extra):
+        return None
+
+NULL_PROFILER = NullProfiler()
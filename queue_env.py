@@ -0,0 +1,313 @@
+import argparse
+import json
+import numpy as np
+from simulation import (MAX_QUEUE, ARRIVAL_PROB, RELEASE_INTERVAL_TICKS, TICK_RATE, TrafficSimulation, TrafficEnv)
+from profiling import NULL_PROFILER
+
+# Fitted to the pixel physics by `python queue_env.py` (see calibrate()).
+# Per-lane lists are indexed by lane; all times are in physics ticks.
+DEFAULT_PARAMS = {
+    # Cars a lane can hold before the last one blocks the spawn point
+    'capacity': [3, 3, 4, 4],
+    # Ticks from spawning until a car stops in slot i of its lane
+    'approach': [[69, 41, 9], [84, 56, 29], [109, 81, 54, 26], [94, 66, 39, 6]],
+    # Ticks the spawn point stays blocked after a car arrives
+    'spawn_gap': [32, 32, 32, 32],
+    # A released car is inside the clearance box for ticks [enter, exit) after release
+    'box_enter': [18, 0, 0, 18],
+    'box_exit': [55, 45, 45, 55],
+    # Ticks for the rest of a queue to move up one slot after a release
+    'shift': [37, 37, 37, 37],
+    # A car still approaching can be released this many ticks before it would stop
+    'near': [30, 30, 30, 30],
+    'release_interval': RELEASE_INTERVAL_TICKS,
+}
+
+class QueueTrafficEnv:
+    # Mesoscopic stand-in for TrafficEnv: each lane is a queue of cars that
+    # only remember when they stopped and how long they have waited. Arrivals
+    # are Bernoulli per lane, departures are limited by the release interval
+    # and the clearance box (the saturation headway), and switching phase costs
+    # the all-red time until the last released car has crossed. Same reset /
+    # step / _get_simplified_state interface and reward as TrafficEnv, no pixels.
+    def __init__(self, params=None, arrival_prob=ARRIVAL_PROB, rng=None):
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        self.action_space = [0, 1, 2, 3]
+        self.visualizer = None
+        self.render_schedule = None
+        self.profiler = NULL_PROFILER
+        self.current_green = 0
+        self.steps_in_current_phase = 0
+        self.min_duration = 40
+        self.max_green_duration = 60
+        self.arrival_prob = arrival_prob
+        # Same role as TrafficEnv.rng
+        self.rng = rng if rng is not None else np.random
+        self.prev_wait = 0
+        self.all_red_ticks = 0
+        self.reset()
+
+    @property
+    def state(self):
+        return np.array([len(q) for q in self.queues])
+
+    def _get_simplified_state(self):
+        # Arrivals already stop at MAX_QUEUE
+        return tuple(map(len, self.queues))
+
+    def _get_feature_state(self):
+        # Same features as TrafficEnv._get_feature_state
+        t = self.ticks
+        waits = tuple(sum(bank + (t - stop if t > stop else 0) for bank, stop in q) / TICK_RATE
+                      for q in self.queues)
+        return tuple(map(len, self.queues)) + waits + (self.steps_in_current_phase,)
+
+    def reset(self):
+        self.ticks = 0
+        self.last_release_tick = -self.params['release_interval'] - 1
+        # Each car is [banked_wait, stop_tick]: its wait is banked_wait plus the
+        # ticks since it stopped moving
+        self.queues = [[], [], [], []]
+        for i in range(4):
+            count = self.rng.randint(1, 4)
+            for _ in range(count):
+                self.queues[i].append([0, 0])
+        self.last_arrival = [-10 ** 9] * 4
+        # (release tick, lane) of cars that may still be in the clearance box
+        self.releases = []
+        self.current_green = 0
+        self.steps_in_current_phase = 0
+        self.prev_wait = 0
+        return self._get_simplified_state()
+
+    def box_busy_until(self, tick):
+        # First tick >= tick at which no released car is inside the clearance box
+        enter, exit_ = self.params['box_enter'], self.params['box_exit']
+        moved = True
+        while moved:
+            moved = False
+            for r, lane in self.releases:
+                if r + enter[lane] <= tick < r + exit_[lane]:
+                    tick = r + exit_[lane]
+                    moved = True
+        return tick
+
+    def step(self, action, return_info=False):
+        prof = self.profiler
+        prof.count('steps')
+        if self.steps_in_current_phase < self.min_duration:
+            action = self.current_green
+
+        queues = self.queues
+        if self.steps_in_current_phase > self.max_green_duration:
+            lengths = [len(q) for q in queues]
+            action = lengths.index(max(lengths))
+
+        switched = (action != self.current_green)
+        self.all_red_ticks = 0
+
+        if switched:
+            # All red until the cars already released have crossed
+            prof.count('switches')
+            clear = self.box_busy_until(self.ticks)
+            self.all_red_ticks = clear - self.ticks
+            self.ticks = clear
+            prof.count('clearance_frames', self.all_red_ticks)
+            self.current_green = action
+            self.steps_in_current_phase = 0
+        else:
+            self.steps_in_current_phase += 1
+
+        self._random_arrivals()
+
+        # reward system (same as TrafficEnv)
+        t = self.ticks
+        total_queue = sum(map(len, queues))
+        queue_penalty = - (total_queue / 20.0)
+
+        curr_wait = 0
+        for q in queues:
+            for bank, stop in q:
+                curr_wait += bank + (t - stop if t > stop else 0)
+        wait_penalty = (self.prev_wait - curr_wait) / 50.0
+        self.prev_wait = curr_wait
+
+        flow_bonus = 0.2 if len(queues[self.current_green]) > 0 else 0.0
+        change_penalty = -0.2 if action != self.current_green else 0.0
+
+        reward = queue_penalty + wait_penalty + flow_bonus + change_penalty
+        reward = max(-1.0, min(1.0, reward))
+
+        next_state = self._get_simplified_state()
+
+        # One physics tick per step
+        prof.count('cars_released', self._tick())
+
+        if return_info:
+            return next_state, reward, {'all_red_ticks': self.all_red_ticks}
+        return next_state, reward
+
+    def _tick(self):
+        p = self.params
+        self.ticks += 1
+        t = self.ticks
+        lane = self.current_green
+        queue = self.queues[lane]
+        if not queue or t - self.last_release_tick <= p['release_interval']:
+            return 0
+        # The head must have stopped, or be close enough to the line, and the
+        # box must have been clear at the end of the previous tick
+        if queue[0][1] - p['near'][lane] > t or self.box_busy_until(t - 1) != t - 1:
+            return 0
+
+        queue.pop(0)
+        self.last_release_tick = t
+        self.releases = [(r, l) for r, l in self.releases if t - r < p['box_exit'][l]]
+        self.releases.append((t, lane))
+        # Everyone behind moves up a slot: they still count the next tick as
+        # waiting, then drive for `shift` ticks
+        ready = t + p['shift'][lane]
+        for car in queue:
+            bank, stop = car
+            if t + 1 > stop:
+                car[0] = bank + t + 1 - stop
+            car[1] = max(stop, ready)
+        return 1
+
+    def _random_arrivals(self):
+        p = self.params
+        t = self.ticks
+        # Same four draws, in the same order, as TrafficEnv._random_arrivals
+        draws = self.rng.random(4).tolist()
+        for i in range(4):
+            if draws[i] < self.arrival_prob:
+                queue = self.queues[i]
+                n = len(queue)
+                if n >= MAX_QUEUE:
+                    continue
+                if n and (n >= p['capacity'][i] or t - self.last_arrival[i] < p['spawn_gap'][i]):
+                    continue
+                approach = p['approach'][i]
+                queue.append([0, t + approach[min(n, len(approach) - 1)]])
+                self.last_arrival[i] = t
+
+    def render(self, action):
+        return False
+
+def load_params(filename):
+    with open(filename) as f:
+        return json.load(f)
+
+def _stop_ticks(sim, car):
+    # Physics ticks (with every light red) until car has stopped in its slot
+    k = 0
+    while not (car.state == "waiting" and car.speed == 0):
+        sim.update_physics(green_lane=-1)
+        k += 1
+    return k
+
+def calibrate(sim=None):
+    # Measures each model parameter by running small scenes through the
+    # pixel-level TrafficSimulation
+    sim = sim if sim is not None else TrafficSimulation()
+    params = {name: [] for name in ('capacity', 'approach', 'spawn_gap', 'box_enter', 'box_exit', 'shift', 'near')}
+    params['release_interval'] = RELEASE_INTERVAL_TICKS
+
+    for lane in range(4):
+        capacity = MAX_QUEUE
+        for n in range(1, MAX_QUEUE):
+            sim.reset()
+            for _ in range(n):
+                sim.add_car(lane, instant=True)
+            sim.add_car(lane)
+            if len(sim.lanes[lane]) == n:
+                capacity = n
+                break
+        params['capacity'].append(capacity)
+
+        approach = []
+        for n in range(capacity):
+            sim.reset()
+            for _ in range(n):
+                sim.add_car(lane, instant=True)
+            sim.add_car(lane)
+            approach.append(_stop_ticks(sim, sim.lanes[lane][-1]))
+        params['approach'].append(approach)
+
+        # How close (in ticks) a lone approaching car gets before it counts as at the line
+        sim.reset()
+        sim.add_car(lane)
+        car = sim.lanes[lane][0]
+        k = 0
+        while car.target_distance(0) >= 100:
+            sim.update_physics(green_lane=-1)
+            k += 1
+        params['near'].append(approach[0] - k)
+
+        sim.reset()
+        sim.add_car(lane)
+        gap = 0
+        while len(sim.lanes[lane]) < 2:
+            sim.update_physics(green_lane=-1)
+            gap += 1
+            sim.add_car(lane)
+        params['spawn_gap'].append(gap)
+
+        sim.reset()
+        sim.add_car(lane, instant=True)
+        sim.add_car(lane, instant=True)
+        sim.update_physics(green_lane=lane)
+        busy = sim.ticks_in_box(sim.leaving_cars[0])
+        params['box_enter'].append(busy[0] if busy else 0)
+        params['box_exit'].append(busy[-1] + 1 if busy else 0)
+        # The car behind still counts as stopped on the tick after the release
+        sim.update_physics(green_lane=-1)
+        params['shift'].append(1 + _stop_ticks(sim, sim.lanes[lane][0]))
+    return params
+
+def compare_backends(params=None, steps=20000, seed=0, episode_steps=150):
+    # Runs TrafficEnv and QueueTrafficEnv under the same random policy and
+    # returns summary statistics for each
+    results = {}
+    for name, env in (('pixel', TrafficEnv()), ('queue', QueueTrafficEnv(params))):
+        np.random.seed(seed)
+        policy = np.random.RandomState(seed)
+        rewards, queues, red, switches = [], [], 0, 0
+        env.reset()
+        for step in range(steps):
+            if step % episode_steps == 0:
+                env.reset()
+            green = env.current_green
+            _, reward, info = env.step(int(policy.randint(4)), return_info=True)
+            rewards.append(reward)
+            queues.append(sum(env.state))
+            red += info['all_red_ticks']
+            switches += env.current_green != green
+        results[name] = {'reward': float(np.mean(rewards)), 'queue': float(np.mean(queues)),
+                         'all_red_per_switch': red / max(switches, 1)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit QueueTrafficEnv to the pixel simulation and compare them")
+    parser.add_argument('--out', default="queue_params.json")
+    parser.add_argument('--steps', type=int, default=20000, help="steps per backend for the comparison")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    params = calibrate()
+    with open(args.out, 'w') as f:
+        json.dump(params, f, indent=2)
+    print(f"Parameters saved to {args.out}")
+    for name, value in params.items():
+        print(f"  {name}: {value}")
+    headways = [max(exit_, params["release_interval"]) + 1 for exit_ in params["box_exit"]]
+    print(f"  saturation headway per lane (ticks): {headways}")
+
+    results = compare_backends(params, args.steps, args.seed)
+    print("\n===== Backend Comparison (random policy) =====")
+    for key in results['pixel']:
+        print(f"{key:<20} pixel {results['pixel'][key]:>8.3f}   queue {results['queue'][key]:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
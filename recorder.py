@@ -0,0 +1,178 @@
+import argparse
+import numpy as np
+# pygame and the visualizer are imported only by ReplayPlayer, so recording
+# works in headless training jobs
+
+# Lane i always drives in LANE_DIRECTIONS[i] (see TrafficSimulation.lane_spawn)
+LANE_DIRECTIONS = ['down', 'up', 'left', 'right']
+
+STEP_DTYPE = np.dtype([
+    ('episode', np.int32), ('step', np.int32), ('tick', np.int32),
+    ('green', np.int8), ('action', np.int8), ('reward', np.float32),
+    ('queues', np.int16, (4,)), ('car_start', np.int64), ('car_count', np.int16),
+])
+CAR_DTYPE = np.dtype([
+    ('x', np.float32), ('y', np.float32), ('lane', np.int8), ('sprite', np.int8),
+    ('braking', np.bool_), ('leaving', np.bool_), ('color', np.uint8, (3,)),
+])
+
+class EpisodeRecorder:
+    # Streams one row per env step plus the cars on screen at that step into a
+    # columnar binary log: chunks of STEP_DTYPE / CAR_DTYPE arrays written
+    # back to back with np.save, so a crash only loses the unflushed chunk.
+    def __init__(self, filename, chunk_size=256):
+        self.file = open(filename, 'wb')
+        self.chunk_size = chunk_size
+        self.episode = -1
+        self.step = 0
+        self.cars_written = 0
+        self.steps = []
+        self.cars = []
+
+    def start_episode(self):
+        self.episode += 1
+        self.step = 0
+
+    def record(self, env, action, reward):
+        sim = env.sim
+        car_start = self.cars_written + len(self.cars)
+        for lane in sim.lanes:
+            for car in lane:
+                self.cars.append((car.x, car.y, car.lane, car.sprite_index, car.is_braking, False, car.color))
+        for car in sim.leaving_cars:
+            self.cars.append((car.x, car.y, car.lane, car.sprite_index, car.is_braking, True, car.color))
+
+        queues = [len(lane) for lane in sim.lanes]
+        self.steps.append((self.episode, self.step, sim.ticks, env.current_green, action, reward,
+                           queues, car_start, self.cars_written + len(self.cars) - car_start))
+        self.step += 1
+        if len(self.steps) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.steps:
+            return
+        np.save(self.file, np.array(self.steps, dtype=STEP_DTYPE))
+        np.save(self.file, np.array(self.cars, dtype=CAR_DTYPE))
+        self.file.flush()
+        self.cars_written += len(self.cars)
+        self.steps = []
+        self.cars = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def load_recording(filename):
+    step_chunks, car_chunks = [], []
+    with open(filename, 'rb') as f:
+        while True:
+            # A run that died mid-write leaves a partial last chunk; drop it
+            try:
+                steps = np.load(f)
+                cars = np.load(f)
+            except (EOFError, ValueError):
+                break
+            step_chunks.append(steps)
+            car_chunks.append(cars)
+    steps = np.concatenate(step_chunks) if step_chunks else np.zeros(0, dtype=STEP_DTYPE)
+    cars = np.concatenate(car_chunks) if car_chunks else np.zeros(0, dtype=CAR_DTYPE)
+    return steps, cars
+
+class ReplayCar:
+    # Just what TrafficVisualizer needs to draw a car
+    __slots__ = ('x', 'y', 'lane', 'direction', 'sprite_index', 'is_braking', 'color')
+
+    def __init__(self, row):
+        self.x, self.y = float(row['x']), float(row['y'])
+        self.lane = int(row['lane'])
+        self.direction = LANE_DIRECTIONS[self.lane]
+        self.sprite_index = int(row['sprite'])
+        self.is_braking = bool(row['braking'])
+        self.color = tuple(int(c) for c in row['color'])
+
+class ReplayPlayer:
+    # Feeds a recording to TrafficVisualizer.draw without physics or an agent.
+    # Keys: space pause, left/right step (shift for 10), up/down speed, home/end seek.
+    def __init__(self, filename, visualizer=None):
+        from function import TrafficVisualizer
+        self.steps, self.cars = load_recording(filename)
+        self.visualizer = visualizer or TrafficVisualizer()
+        self.position = 0.0
+        self.speed = 1.0
+        self.paused = False
+
+    def seek_episode(self, episode):
+        hits = np.flatnonzero(self.steps['episode'] == episode)
+        if len(hits):
+            self.position = float(hits[0])
+
+    def show(self, index):
+        row = self.steps[index]
+        sim = self.visualizer.sim
+        sim.lanes = [[], [], [], []]
+        sim.leaving_cars = []
+        for car_row in self.cars[row['car_start']:row['car_start'] + row['car_count']]:
+            car = ReplayCar(car_row)
+            if car_row['leaving']:
+                sim.leaving_cars.append(car)
+            else:
+                sim.lanes[car.lane].append(car)
+
+        import pygame
+        pygame.display.set_caption(f"Replay | Episode {row['episode'] + 1} Step {row['step']} | "
+                                   f"Action {row['action']} | Reward {row['reward']:.2f} | {self.speed:g}x")
+        return self.visualizer.draw(active_index=int(row['green']))
+
+    def handle_keys(self):
+        import pygame
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if event.type != pygame.KEYDOWN:
+                continue
+            jump = 10 if event.mod & pygame.KMOD_SHIFT else 1
+            if event.key == pygame.K_SPACE: self.paused = not self.paused
+            elif event.key == pygame.K_RIGHT: self.position += jump
+            elif event.key == pygame.K_LEFT: self.position -= jump
+            elif event.key == pygame.K_UP: self.speed = min(self.speed * 2, 64.0)
+            elif event.key == pygame.K_DOWN: self.speed = max(self.speed / 2, 1 / 16)
+            elif event.key == pygame.K_HOME: self.position = 0.0
+            elif event.key == pygame.K_END: self.position = len(self.steps) - 1
+            elif event.key == pygame.K_ESCAPE: return False
+        return True
+
+    def play(self, speed=1.0):
+        self.speed = speed
+        while len(self.steps):
+            if not self.handle_keys():
+                break
+            self.position = min(max(self.position, 0.0), len(self.steps) - 1)
+            if not self.show(int(self.position)):
+                break
+            if not self.paused:
+                self.position += self.speed
+                if self.position > len(self.steps) - 1:
+                    self.paused = True
+        self.visualizer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded traffic run")
+    parser.add_argument('recording')
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--episode', type=int, default=1)
+    args = parser.parse_args()
+
+    player = ReplayPlayer(args.recording)
+    player.seek_episode(args.episode - 1)
+    player.play(args.speed)
+
+
+if __name__ == "__main__":
+    main()
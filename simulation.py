@@ -0,0 +1,412 @@
+import numpy as np
+import random
+from profiling import NULL_PROFILER
+
+# --- CONSTANTS ---
+CAR_WIDTH = 34
+CAR_LENGTH = 64
+GAP_SIZE = 110
+WAIT_THRESHOLD = 300
+MAX_QUEUE = 20
+ARRIVAL_PROB = 0.20
+# Simulated time: one physics tick is 1/TICK_RATE seconds, whatever the host speed
+TICK_RATE = 60
+RELEASE_INTERVAL_TICKS = int(0.4 * TICK_RATE)
+# Ranges of TrafficEnv._get_feature_state(): queue per lane, seconds waited per
+# lane (clipped here), steps in the current phase
+FEATURE_LOW = (0,) * 9
+FEATURE_HIGH = (MAX_QUEUE,) * 4 + (20.0,) * 4 + (62,)
+# Leaving cars are dropped once they drive out of these x / y ranges
+EXIT_X = (-300, 1100)
+EXIT_Y = (-300, 900)
+
+class CarEntity:
+    def __init__(self, lane, stop_pos, start_pos, direction, sprite_index):
+        self.lane = lane
+        self.x = start_pos[0]
+        self.y = start_pos[1]
+        self.direction = direction
+        self.sprite_index = sprite_index
+        self.color = (random.randint(50,255), random.randint(50,255), random.randint(50,255))
+
+        self.speed = 0
+        self.max_speed = 4.0
+        # --- SMOOTHNESS UPDATE: Agile Cars ---
+        self.accel = 0.4
+        self.decel = 0.2
+        self.state = "approaching"
+        self.stop_pos_base = stop_pos
+        self.is_braking = False
+        self.wait_time = 0
+
+    def target_distance(self, car_index_in_queue, gap_spacing=GAP_SIZE):
+        if self.direction == 'down':
+            target = self.stop_pos_base - (car_index_in_queue * gap_spacing)
+            return target - self.y
+        elif self.direction == 'up':
+            target = self.stop_pos_base + (car_index_in_queue * gap_spacing)
+            return self.y - target
+        elif self.direction == 'left':
+            target = self.stop_pos_base + (car_index_in_queue * gap_spacing)
+            return self.x - target
+        elif self.direction == 'right':
+            target = self.stop_pos_base - (car_index_in_queue * gap_spacing)
+            return target - self.x
+
+    def update(self, car_index_in_queue, gap_spacing=GAP_SIZE):
+        if self.state == "waiting" and self.speed < 0.1:
+            self.wait_time += 1
+
+        if self.state == "leaving":
+            self.speed = min(self.speed + 0.3, 6.0)
+            self.is_braking = False
+            self.move_by_speed()
+            return
+
+        dist = self.target_distance(car_index_in_queue, gap_spacing)
+
+        if dist > 40:
+            self.speed = min(self.speed + self.accel, self.max_speed)
+            self.is_braking = False
+            self.state = "approaching"
+        elif dist > 1:
+            # Smooth braking that doesn't "jump" speed
+            target_speed = max(0.0, dist * 0.3)
+            self.speed = min(self.max_speed, target_speed)
+            self.is_braking = True
+        else:
+            self.speed = 0
+            self.is_braking = True
+            self.state = "waiting"
+
+        if self.speed > 0:
+            self.move_by_speed()
+
+    def move_by_speed(self):
+        if self.direction == 'down': self.y += self.speed
+        elif self.direction == 'up': self.y -= self.speed
+        elif self.direction == 'left': self.x -= self.speed
+        elif self.direction == 'right': self.x += self.speed
+
+class TrafficSimulation:
+    # Pure queue/car physics, no pygame. A TrafficVisualizer can be attached
+    # as an observer to draw it, but training can run without one.
+    def __init__(self):
+        self.cx, self.cy = 400, 300
+        self.road_w = 140
+        self.lane_w = self.road_w // 2
+        self.stop_off = self.road_w // 2 + 15
+
+        self.observers = []
+        self.lanes = [[], [], [], []]
+        self.leaving_cars = []
+        self.ticks = 0
+        self.last_release_tick = -RELEASE_INTERVAL_TICKS - 1
+
+    @property
+    def sim_time(self):
+        return self.ticks / TICK_RATE
+
+    def reset(self):
+        self.lanes = [[], [], [], []]
+        self.leaving_cars = []
+        self.ticks = 0
+        self.last_release_tick = -RELEASE_INTERVAL_TICKS - 1
+
+    def lane_spawn(self, lane_index):
+        offset = 12
+        if lane_index == 0:
+            return self.cy - self.stop_off - 80, (self.cx - self.lane_w//2 - offset, -100), 'down'
+        elif lane_index == 1:
+            return self.cy + self.stop_off + 20, (self.cx + self.lane_w//2 - offset, 700), 'up'
+        elif lane_index == 2:
+            return self.cx + self.stop_off + 20, (900, self.cy - self.lane_w//2 - offset), 'left'
+        elif lane_index == 3:
+            return self.cx - self.stop_off - 80, (-100, self.cy + self.lane_w//2 - offset), 'right'
+
+    def add_car(self, lane_index, instant=False):
+        sprite_index = random.randint(0, 6)
+        stop, start, d = self.lane_spawn(lane_index)
+
+        if not instant and len(self.lanes[lane_index]) > 0:
+            last_car = self.lanes[lane_index][-1]
+            safe_dist = 110
+            if d == 'down' and last_car.y < start[1] + safe_dist: return
+            if d == 'up' and last_car.y > start[1] - safe_dist: return
+            if d == 'left' and last_car.x > start[0] - safe_dist: return
+            if d == 'right' and last_car.x < start[0] + safe_dist: return
+
+        car = CarEntity(lane_index, stop, start, d, sprite_index)
+        if instant:
+            if d=='down': car.y = stop - (len(self.lanes[lane_index]) * GAP_SIZE)
+            elif d=='up': car.y = stop + (len(self.lanes[lane_index]) * GAP_SIZE)
+            elif d=='left': car.x = stop + (len(self.lanes[lane_index]) * GAP_SIZE)
+            elif d=='right': car.x = stop - (len(self.lanes[lane_index]) * GAP_SIZE)
+            car.state = "waiting"
+        self.lanes[lane_index].append(car)
+
+    def release_car(self, lane_index):
+        if len(self.lanes[lane_index]) > 0:
+            car = self.lanes[lane_index].pop(0)
+            car.state = "leaving"
+            self.leaving_cars.append(car)
+            return True
+        return False
+
+    def clearance_box(self):
+        margin = 40
+        x1 = self.cx - self.road_w//2 - margin
+        x2 = self.cx + self.road_w//2 + margin
+        y1 = self.cy - self.road_w//2 - margin
+        y2 = self.cy + self.road_w//2 + margin
+        return x1, x2, y1, y2
+
+    def is_intersection_clear(self):
+        x1, x2, y1, y2 = self.clearance_box()
+
+        for car in self.leaving_cars:
+            if x1 < car.x < x2 and y1 < car.y < y2:
+                return False
+        return True
+
+    def ticks_in_box(self, car):
+        # Future ticks (0 = now) at which a leaving car is inside the clearance
+        # box. Leaving cars only accelerate straight ahead, so this is one
+        # contiguous run; the speed recurrence is the one CarEntity.update uses,
+        # so the answer matches stepping the physics exactly.
+        x1, x2, y1, y2 = self.clearance_box()
+        vertical = car.direction in ('down', 'up')
+        sign = 1 if car.direction in ('down', 'right') else -1
+        lo, hi = (y1, y2) if vertical else (x1, x2)
+        side = car.x if vertical else car.y
+        if not ((x1 < side < x2) if vertical else (y1 < side < y2)):
+            return []
+
+        pos, speed = (car.y if vertical else car.x), car.speed
+        exit_lo, exit_hi = EXIT_Y if vertical else EXIT_X
+        busy, t = [], 0
+        while exit_lo < pos < exit_hi:
+            if lo < pos < hi:
+                busy.append(t)
+            elif busy or (sign > 0 and pos >= hi) or (sign < 0 and pos <= lo):
+                break
+            speed = min(speed + 0.3, 6.0)
+            pos += sign * speed
+            t += 1
+        return busy
+
+    def clear_intersection(self):
+        # Same result as calling update_physics(green_lane=-1) until
+        # is_intersection_clear(), without stepping tick by tick: the number of
+        # all-red ticks comes from the leaving cars' paths, cars already stopped
+        # in their queue just add that many ticks of waiting, and only the cars
+        # still moving are stepped. Observers are not called; returns the ticks.
+        busy = set()
+        for car in self.leaving_cars:
+            busy.update(self.ticks_in_box(car))
+        ticks = 0
+        while ticks in busy:
+            ticks += 1
+        if ticks == 0:
+            return 0
+
+        self.ticks += ticks
+        for queue in self.lanes:
+            for i, car in enumerate(queue):
+                left = ticks
+                if not (car.state == "waiting" and car.speed == 0 and car.target_distance(i) <= 1):
+                    # Step until it stops at its slot; from then on update() only counts waiting
+                    while left:
+                        car.update(i)
+                        left -= 1
+                        if car.state == "waiting" and car.speed == 0:
+                            break
+                car.wait_time += left
+
+        for car in self.leaving_cars:
+            pos = car.y if car.direction in ('down', 'up') else car.x
+            sign = 1 if car.direction in ('down', 'right') else -1
+            speed = car.speed
+            for _ in range(ticks):
+                speed = min(speed + 0.3, 6.0)
+                pos += sign * speed
+            if car.direction in ('down', 'up'): car.y = pos
+            else: car.x = pos
+            car.speed = speed
+            car.is_braking = False
+        self.leaving_cars = [car for car in self.leaving_cars
+                             if EXIT_X[0] < car.x < EXIT_X[1] and EXIT_Y[0] < car.y < EXIT_Y[1]]
+        return ticks
+
+    def update_physics(self, green_lane):
+        cars_released = 0
+        self.ticks += 1
+
+        for lane_idx, queue in enumerate(self.lanes):
+            for i, car in enumerate(queue):
+                car.update(i)
+
+            if lane_idx == green_lane and len(queue) > 0:
+                if not self.is_intersection_clear():
+                    continue
+
+                first_car = queue[0]
+
+                # --- SMOOTHNESS UPDATE: Extended Distance & Faster Timer ---
+                dist_to_stop = 0
+                if first_car.direction == 'down': dist_to_stop = first_car.stop_pos_base - first_car.y
+                elif first_car.direction == 'up': dist_to_stop = first_car.y - first_car.stop_pos_base
+                elif first_car.direction == 'left': dist_to_stop = first_car.x - first_car.stop_pos_base
+                elif first_car.direction == 'right': dist_to_stop = first_car.stop_pos_base - first_car.x
+
+                # Update: Reduced delay from 0.8 to 0.4 seconds for faster release
+                # Update: Increased detection distance from 60 to 100 pixels
+                # The delay is counted in simulated ticks, not wall-clock seconds
+                if self.ticks - self.last_release_tick > RELEASE_INTERVAL_TICKS:
+                    if dist_to_stop < 100 or first_car.state == "waiting":
+                        car = queue.pop(0)
+                        car.state = "leaving"
+                        self.leaving_cars.append(car)
+                        self.last_release_tick = self.ticks
+                        cars_released += 1
+
+        for car in self.leaving_cars:
+            car.update(0)
+        self.leaving_cars = [car for car in self.leaving_cars
+                             if EXIT_X[0] < car.x < EXIT_X[1] and EXIT_Y[0] < car.y < EXIT_Y[1]]
+
+        for observer in self.observers:
+            observer.on_physics_update(self)
+
+        return cars_released
+
+class TrafficEnv:
+    def __init__(self, visualizer=None, rng=None):
+        self.action_space = [0, 1, 2, 3]
+        self.visualizer = visualizer
+        # The visualizer only observes the simulation, so without one we run headless
+        self.sim = visualizer.sim if visualizer else TrafficSimulation()
+        self.current_green = 0
+        self.steps_in_current_phase = 0
+        self.min_duration = 40
+        self.max_green_duration = 60
+        self.arrival_prob = ARRIVAL_PROB
+        # Source of the initial queues and arrivals: anything with the
+        # np.random.RandomState API, the global np.random by default
+        self.rng = rng if rng is not None else np.random
+        self.prev_wait = 0
+        # All-red ticks spent clearing the junction on the last step (0 if no switch)
+        self.all_red_ticks = 0
+        # Optional RenderSchedule deciding which all-red frames get drawn
+        self.render_schedule = None
+        # Swap in a profiling.PhaseProfiler to time the phases of each step
+        self.profiler = NULL_PROFILER
+        self.reset()
+
+    @property
+    def state(self):
+        return np.array([len(l) for l in self.sim.lanes])
+
+    def _get_simplified_state(self):
+        # Plain ints, which hash and index faster than NumPy scalars in the agent
+        return tuple(min(len(l), MAX_QUEUE) for l in self.sim.lanes)
+
+    def _get_feature_state(self):
+        # Richer state for function-approximation agents (see FEATURE_HIGH)
+        queues = tuple(min(len(l), MAX_QUEUE) for l in self.sim.lanes)
+        waits = tuple(sum(car.wait_time for car in l) / TICK_RATE for l in self.sim.lanes)
+        return queues + waits + (self.steps_in_current_phase,)
+
+    def reset(self):
+        if self.visualizer:
+            self.visualizer.reset_cars()
+        else:
+            self.sim.reset()
+        for i in range(4):
+            count = self.rng.randint(1, 4)
+            for _ in range(count):
+                self.sim.add_car(i, instant=True)
+        self.current_green = 0
+        self.steps_in_current_phase = 0
+        self.prev_wait = 0
+        return self._get_simplified_state()
+
+    def step(self, action, return_info=False):
+        # return_info=True adds a dict with the all-red duration of this step
+        prof = self.profiler
+        prof.count('steps')
+        if self.steps_in_current_phase < self.min_duration:
+            action = self.current_green
+
+        if self.steps_in_current_phase > self.max_green_duration:
+            action = np.argmax(self.state)
+
+        switched = (action != self.current_green)
+        self.all_red_ticks = 0
+
+        if switched:
+            # All red until the cars already released have crossed
+            prof.count('switches')
+            t = prof.start()
+            if self.visualizer is None and not self.sim.observers:
+                # Nothing to draw, so jump straight to the tick the box is clear
+                self.all_red_ticks = self.sim.clear_intersection()
+            while not self.sim.is_intersection_clear():
+                self.sim.update_physics(green_lane=-1)
+                self.all_red_ticks += 1
+                if self.visualizer and (self.render_schedule is None or self.render_schedule.due(self.sim.ticks)):
+                    prof.stop('clearance', t)
+                    t = prof.start()
+                    drawn = self.visualizer.draw(active_index=-1)
+                    prof.stop('render', t)
+                    if not drawn:
+                        return (None, 0, {'all_red_ticks': self.all_red_ticks}) if return_info else (None, 0)
+                    t = prof.start()
+            prof.stop('clearance', t)
+            prof.count('clearance_frames', self.all_red_ticks)
+
+            self.current_green = action
+            self.steps_in_current_phase = 0
+        else:
+            self.steps_in_current_phase += 1
+
+        t = prof.start()
+        self._random_arrivals()
+        prof.stop('arrivals', t)
+
+        # reward system (UNCHANGED)
+        total_queue = sum(self.state)
+        queue_penalty = - (total_queue / 20.0)
+
+        prev_wait = getattr(self, "prev_wait", 0)
+        curr_wait = sum(car.wait_time for lane in self.sim.lanes for car in lane)
+        wait_penalty = (prev_wait - curr_wait) / 50.0
+        self.prev_wait = curr_wait
+
+        flow_bonus = 0.2 if self.state[self.current_green] > 0 else 0.0
+        change_penalty = -0.2 if action != self.current_green else 0.0
+
+        reward = queue_penalty + wait_penalty + flow_bonus + change_penalty
+        reward = max(-1.0, min(1.0, reward))
+
+        next_state = self._get_simplified_state()
+
+        # One physics tick per step, whether or not anything is drawn
+        t = prof.start()
+        prof.count('cars_released', self.sim.update_physics(green_lane=self.current_green))
+        prof.stop('physics', t)
+
+        if return_info:
+            return next_state, reward, {'all_red_ticks': self.all_red_ticks}
+        return next_state, reward
+
+    def _random_arrivals(self):
+        for i in range(4):
+            if self.rng.random() < self.arrival_prob:
+                if len(self.sim.lanes[i]) < MAX_QUEUE:
+                    self.sim.add_car(i)
+
+    def render(self, action):
+        if self.visualizer:
+            return self.visualizer.draw(active_index=action)
+        return False
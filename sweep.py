@@ -0,0 +1,99 @@
+import argparse
+import itertools
+import os
+import random
+import numpy as np
+from multiprocessing import Pool
+from simulation import TrafficEnv
+from agent import QLearner
+from training import train_agent
+
+# The values main.main() uses are in every list so the default run is part of the sweep
+DEFAULT_GRID = {
+    'learning_rate': [0.01, 0.05, 0.1],
+    'discount_factor': [0.8, 0.9, 0.95],
+    'exploration_rate': [1.0],
+    'epsilon_decay': [0.97, 0.99],
+    'epsilon_min': [0.05],
+}
+PARAM_NAMES = list(DEFAULT_GRID)
+
+def grid_configs(grid=DEFAULT_GRID):
+    values = [grid[name] for name in PARAM_NAMES]
+    return [dict(zip(PARAM_NAMES, combo)) for combo in itertools.product(*values)]
+
+def random_configs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n):
+        configs.append({
+            'learning_rate': float(10 ** rng.uniform(-3, -0.5)),
+            'discount_factor': float(rng.uniform(0.7, 0.99)),
+            'exploration_rate': 1.0,
+            'epsilon_decay': float(rng.uniform(0.95, 0.999)),
+            'epsilon_min': float(rng.choice([0.01, 0.05, 0.1])),
+        })
+    return configs
+
+def run_config(job):
+    # Runs in a worker process with its own headless env and seeded RNGs
+    config, episodes, steps_per_episode, seed = job
+    np.random.seed(seed)
+    random.seed(seed)
+
+    env = TrafficEnv()
+    agent = QLearner(learning_rate=config['learning_rate'],
+                     discount_factor=config['discount_factor'],
+                     exploration_rate=config['exploration_rate'],
+                     dense=True)
+    rewards = train_agent(env, agent, episodes, steps_per_episode,
+                          epsilon_decay=config['epsilon_decay'],
+                          epsilon_min=config['epsilon_min'])
+    return np.array(rewards), agent.q_table
+
+def run_sweep(configs, episodes=200, steps_per_episode=150, processes=None, seed=0):
+    jobs = [(config, episodes, steps_per_episode, seed + i) for i, config in enumerate(configs)]
+    rewards, q_tables = [], []
+    with Pool(processes) as pool:
+        for i, (r, q) in enumerate(pool.imap(run_config, jobs)):
+            rewards.append(r)
+            q_tables.append(q)
+            print(f"Config {i + 1}/{len(configs)}: {configs[i]} | Last-20 Avg Reward = {np.mean(r[-20:]):.2f}")
+    return np.array(rewards), np.array(q_tables)
+
+def save_results(configs, rewards, q_tables, filename="sweep_results.npz"):
+    # One store for the whole sweep: a column per parameter, one reward curve
+    # and one dense Q-table per config (mostly zeros, so it compresses well)
+    columns = {name: np.array([c[name] for c in configs]) for name in PARAM_NAMES}
+    np.savez_compressed(filename, rewards=rewards, q_tables=q_tables, **columns)
+    print(f"Sweep results saved to {filename}")
+
+def load_results(filename="sweep_results.npz"):
+    data = np.load(filename)
+    configs = [dict(zip(PARAM_NAMES, (float(data[name][i]) for name in PARAM_NAMES)))
+               for i in range(len(data['rewards']))]
+    return configs, data['rewards'], data['q_tables']
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep for the Q-learning agent")
+    parser.add_argument('--mode', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--samples', type=int, default=32, help="number of configs for random search")
+    parser.add_argument('--episodes', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=150)
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default="sweep_results.npz")
+    args = parser.parse_args()
+
+    configs = grid_configs() if args.mode == 'grid' else random_configs(args.samples, args.seed)
+    print(f"Running {len(configs)} configs on {args.processes} processes...")
+    rewards, q_tables = run_sweep(configs, args.episodes, args.steps, args.processes, args.seed)
+    save_results(configs, rewards, q_tables, args.out)
+
+    best = int(np.argmax(rewards[:, -20:].mean(axis=1)))
+    print("\n===== Best Config =====")
+    print(f"{configs[best]} | Last-20 Avg Reward = {rewards[best, -20:].mean():.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from agent import QLearner, ReplayBuffer, dict_to_dense, dense_to_dict, encode_state, decode_states
+from simulation import TrafficEnv
+from training import run_episode
+
+
+def random_transitions(n, levels, seed=0):
+    rng = np.random.RandomState(seed)
+    states = [tuple(int(c) for c in s) for s in rng.randint(0, levels, (n, 4))]
+    return [(states[i], int(rng.randint(4)), float(rng.randn()), states[i - 1]) for i in range(n)]
+
+
+def test_encode_state_round_trip():
+    for state in [(0, 0, 0, 0), (20, 20, 20, 20), (1, 5, 0, 17)]:
+        assert tuple(decode_states(encode_state(state))) == state
+
+
+def test_dense_and_dict_updates_agree():
+    agents = [QLearner(learning_rate=0.1, dense=False), QLearner(learning_rate=0.1, dense=True)]
+    for state, action, reward, next_state in random_transitions(2000, levels=3):
+        for agent in agents:
+            agent.update_q_value(state, action, reward, next_state)
+    np.testing.assert_allclose(dict_to_dense(agents[0].q_table), agents[1].q_table, rtol=1e-5, atol=1e-6)
+
+    agents[0].epsilon = agents[1].epsilon = 0.0
+    for state, _, _, _ in random_transitions(200, levels=3, seed=1):
+        for green in range(4):
+            assert agents[0].choose_action(state, green) == agents[1].choose_action(state, green)
+
+
+def test_dense_and_dict_train_the_same():
+    rewards = []
+    for dense in (False, True):
+        np.random.seed(3)
+        agent = QLearner(dense=dense)
+        env = TrafficEnv()
+        rewards.append([run_episode(env, agent, 150) for _ in range(3)])
+    assert rewards[0] == rewards[1]
+
+
+@pytest.mark.parametrize("prioritized", [False, True])
+def test_dense_and_dict_replay_agree(prioritized):
+    # Few distinct states, so (state, action) pairs repeat within a batch
+    tables = []
+    for dense in (False, True):
+        buffer = ReplayBuffer(100, prioritized=prioritized, beta_steps=20, seed=1)
+        for transition in random_transitions(50, levels=2):
+            buffer.add(*transition)
+        agent = QLearner(learning_rate=0.05, dense=dense)
+        for _ in range(20):
+            agent.replay_update(buffer, 32)
+        tables.append(agent.q_table if dense else dict_to_dense(agent.q_table))
+    np.testing.assert_allclose(tables[0], tables[1], rtol=1e-5, atol=1e-6)
+
+
+def test_replay_buffer_sizes_columns_from_first_state():
+    buffer = ReplayBuffer(10)
+    buffer.add((0.5,) * 9, 1, 0.1, (0.25,) * 9)
+    assert buffer.states.shape == (10, 9) and buffer.states.dtype == np.float32
+    with pytest.raises(ValueError):
+        buffer.add((1, 2, 3, 4), 0, 0.0, (1, 2, 3, 4))
+    with pytest.raises(ValueError):
+        QLearner().replay_update(buffer, 4)
+
+
+def test_dense_table_survives_save_and_load(tmp_path):
+    agent = QLearner(dense=True)
+    for transition in random_transitions(500, levels=21):
+        agent.update_q_value(*transition)
+    filename = str(tmp_path / "brain.pkl")
+    agent.save_model(filename)
+
+    loaded = QLearner(dense=True)
+    assert loaded.load_model(filename)
+    np.testing.assert_array_equal(loaded.q_table, agent.q_table)
+    assert dense_to_dict(loaded.q_table) == dense_to_dict(agent.q_table)
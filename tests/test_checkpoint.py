@@ -0,0 +1,58 @@
+import os
+import random
+import numpy as np
+from agent import QLearner, TileCodingLearner
+from checkpoint import save_checkpoint, load_checkpoint, restore_checkpoint
+from simulation import TrafficEnv
+from training import run_episode
+
+
+def train(agent, env, episodes):
+    return [run_episode(env, agent, 100) for _ in range(episodes)]
+
+
+def test_resume_from_episode_boundary_is_exact(tmp_path):
+    filename = str(tmp_path / "checkpoint.pkl")
+    for make_agent in (QLearner, TileCodingLearner):
+        np.random.seed(5)
+        random.seed(5)
+        env = TrafficEnv()
+        straight = make_agent()
+        expected = train(straight, env, 4)
+
+        np.random.seed(5)
+        random.seed(5)
+        env = TrafficEnv()
+        first = make_agent()
+        rewards = train(first, env, 2)
+        save_checkpoint(filename, first, 2, rewards)
+
+        # Disturb both RNGs, as a new process would
+        np.random.seed(99)
+        random.seed(99)
+        resumed = make_agent()
+        episode, rewards = restore_checkpoint(load_checkpoint(filename), resumed)
+        assert episode == 2
+        rewards += train(resumed, env, 2)
+        assert rewards == expected
+
+
+def test_checkpoint_write_is_atomic_and_readable(tmp_path):
+    filename = str(tmp_path / "checkpoint.pkl")
+    assert load_checkpoint(filename) is None
+    save_checkpoint(filename, QLearner(), 1, [0.5])
+    save_checkpoint(filename, QLearner(), 2, [0.5, 0.25])
+    assert load_checkpoint(filename)['episode'] == 2
+    # No temp files left behind, and the umask decides the mode, not mkstemp
+    assert os.listdir(tmp_path) == ["checkpoint.pkl"]
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat(filename).st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_save_leaves_the_umask_alone(tmp_path, monkeypatch):
+    # Setting the umask, even briefly, would race file creation in other threads
+    def no_umask(mask):
+        raise AssertionError("os.umask called")
+    monkeypatch.setattr(os, "umask", no_umask)
+    save_checkpoint(str(tmp_path / "checkpoint.pkl"), QLearner(), 1, [0.5])
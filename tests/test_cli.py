@@ -0,0 +1,31 @@
+import sys
+import pytest
+import cli
+from checkpoint import load_checkpoint
+
+
+def run_cli(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["cli.py", *argv])
+    return cli.main()
+
+
+def test_resume_continues_the_epsilon_schedule(tmp_path, monkeypatch):
+    model = str(tmp_path / "brain.pkl")
+    common = ["--backend", "queue", "--steps", "20", "--model", model, "--seed", "0"]
+    run_cli(monkeypatch, "train", "--episodes", "5", *common)
+    checkpoint = load_checkpoint(str(tmp_path / "brain_checkpoint.pkl"))
+    assert checkpoint['episode'] == 5
+    assert checkpoint['epsilon'] == pytest.approx(0.99 ** 5)
+
+    run_cli(monkeypatch, "train", "--episodes", "3", "--resume", *common)
+    checkpoint = load_checkpoint(str(tmp_path / "brain_checkpoint.pkl"))
+    assert checkpoint['episode'] == 8
+    assert checkpoint['epsilon'] == pytest.approx(0.99 ** 8)
+    assert len(checkpoint['rewards_history']) == 8
+
+
+def test_unknown_bench_suite_is_a_usage_error(monkeypatch, capsys):
+    with pytest.raises(SystemExit) as exc:
+        run_cli(monkeypatch, "bench", "--suite", "nope")
+    assert exc.value.code == 2
+    assert "unknown suite nope" in capsys.readouterr().err
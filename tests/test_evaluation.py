@@ -0,0 +1,29 @@
+import numpy as np
+from agent import QLearner
+from evaluation import evaluate, mean_ci, METRICS
+
+
+def test_evaluate_is_reproducible_and_paired():
+    q_table = QLearner(dense=True).q_table
+    runs = [evaluate(q_table, dense=True, seeds=4, steps_per_episode=60, green_durations=[40, 40],
+                     processes=1, chunk_size=chunk) for chunk in (1, 3)]
+    for results in runs:
+        assert set(results) == {'agent', 40}
+        assert results['agent'].shape == (4, len(METRICS))
+    # Chunking does not change which stream a seed gets
+    for controller in runs[0]:
+        np.testing.assert_array_equal(runs[0][controller], runs[1][controller])
+
+
+def test_each_seed_gets_its_own_stream():
+    results = evaluate(QLearner(dense=True).q_table, dense=True, seeds=3, steps_per_episode=60,
+                       green_durations=[50], processes=1)
+    rows = results[50]
+    assert not np.array_equal(rows[0], rows[1]) and not np.array_equal(rows[1], rows[2])
+
+
+def test_mean_ci():
+    mean, half = mean_ci([1.0, 2.0, 3.0, 4.0])
+    assert mean == 2.5
+    assert np.isclose(half, 1.96 * np.std([1, 2, 3, 4], ddof=1) / 2)
+    assert np.isnan(mean_ci([1.0])[1])
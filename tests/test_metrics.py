@@ -0,0 +1,80 @@
+import random
+import numpy as np
+import pytest
+from metrics import MetricsWriter, RollingStats, load_episodes, load_metrics
+from simulation import TrafficEnv
+
+
+def write_run(filename, episodes, first=1, append=False, steps=30):
+    np.random.seed(first)
+    random.seed(first)
+    env = TrafficEnv()
+    with MetricsWriter(filename, chunk_size=16, window=5, append=append) as metrics:
+        for episode in range(first, first + episodes):
+            metrics.start_episode(episode)
+            env.reset()
+            for step in range(steps):
+                _, reward = env.step(step // 10 % 4)
+                metrics.record_step(env, reward, 0.5)
+            metrics.end_episode(0.5)
+
+
+def test_episode_reader_matches_full_reader(tmp_path):
+    filename = str(tmp_path / "metrics.bin")
+    write_run(filename, 6)
+    steps, episodes = load_metrics(filename)
+    assert len(steps) == 6 * 30
+    np.testing.assert_array_equal(load_episodes(filename), episodes)
+    assert episodes['episode'].tolist() == list(range(1, 7))
+    for row in episodes:
+        assert row['reward'] == pytest.approx(steps['reward'][steps['episode'] == row['episode']].sum(), rel=1e-5)
+
+
+def test_episode_reader_skips_step_data(tmp_path):
+    # Scribbling over the step rows must not matter, as they are never read
+    filename = str(tmp_path / "metrics.bin")
+    write_run(filename, 3)
+    expected = load_episodes(filename)
+    raw = bytearray(open(filename, 'rb').read())
+    header = raw.index(b'\n') + 1
+    raw[header:header + 64] = b'\xff' * 64
+    open(filename, 'wb').write(raw)
+    np.testing.assert_array_equal(load_episodes(filename), expected)
+
+
+def test_resumed_run_keeps_latest_episodes_and_drops_torn_chunk(tmp_path):
+    filename = str(tmp_path / "metrics.bin")
+    write_run(filename, 4)
+    write_run(filename, 3, first=3, append=True)
+    with open(filename, 'ab') as f:
+        f.write(b'\x93NUMPY partial')
+    episodes = load_episodes(filename)
+    assert episodes['episode'].tolist() == [1, 2, 3, 4, 5]
+    steps, full = load_metrics(filename)
+    np.testing.assert_array_equal(full, episodes)
+    assert len(steps) == 5 * 30
+
+
+def test_rolling_stats_match_numpy():
+    values = np.random.RandomState(0).randn(50) * 10
+    stats = RollingStats(window=8)
+    for i, x in enumerate(values):
+        stats.add(x)
+        last = values[max(0, i - 7):i + 1]
+        assert stats.mean == pytest.approx(last.mean())
+        if len(last) > 1:
+            assert stats.std == pytest.approx(last.std(ddof=1))
+    assert stats.overall_mean == pytest.approx(values.mean())
+    assert stats.best == values.max()
+
+
+def test_live_plot_history_stays_bounded():
+    matplotlib = pytest.importorskip("matplotlib")
+    matplotlib.use("Agg")
+    from metrics import LivePlot
+    plot = LivePlot(window=5, max_points=50, every=25)
+    for episode in range(1, 501):
+        plot.update(episode, float(episode), float(episode))
+    assert len(plot.x) <= 50 and len(plot.avg_x) <= 50
+    assert plot.x[0] == 1 and plot.x[-1] > 450
+    plot.plt.close(plot.fig)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from network import TrafficNetwork, run_network_episode
+from agent import QLearner
+
+
+class RecordingNetwork(TrafficNetwork):
+    # Inner lanes have arrival_prob 0, so every car spawned there was handed over
+    def _spawn(self, mask):
+        self.spawned += mask & ~self.boundary
+        super()._spawn(mask)
+
+    def reset(self):
+        self.spawned = np.zeros((self.num_envs, 4), dtype=np.int64)
+        return super().reset()
+
+
+def test_cars_reach_the_next_junction_within_an_episode():
+    net = RecordingNetwork(1, 10, seed=0)
+    net.reset()
+    # Ask every junction for the eastbound green (lane 3) for a default-length episode
+    for _ in range(150):
+        net.step([3] * net.num_envs)
+    # Cars released at junction i show up queued at junction i + 1, and nowhere else
+    assert (net.spawned[1:, 3] > 0).all()
+    assert net.spawned[0].sum() == 0
+    assert net.spawned[:, :3].sum() == 0
+
+
+def test_network_episode_runs_with_one_agent_per_junction():
+    net = TrafficNetwork(2, 3, seed=0)
+    agents = [QLearner() for _ in range(net.num_envs)]
+    rewards = run_network_episode(net, agents, 150)
+    assert rewards.shape == (6,)
+    assert any(agent.q_table for agent in agents)
+
+
+def test_handover_waits_for_the_link():
+    net = RecordingNetwork(1, 2, seed=0, link_ticks=1000)
+    net.reset()
+    for _ in range(150):
+        net.step([3, 2])
+    assert net.spawned.sum() == 0
+    assert net.link.sum() > 0
+
+
+def test_link_ticks_must_be_positive():
+    with pytest.raises(ValueError):
+        TrafficNetwork(1, 2, link_ticks=0)
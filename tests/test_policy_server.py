@@ -0,0 +1,57 @@
+import http.client
+import json
+import threading
+import numpy as np
+import pytest
+from agent import QLearner, NUM_STATES
+from policy_server import make_server, PolicyClient
+
+
+@pytest.fixture
+def server(tmp_path):
+    agent = QLearner(dense=True)
+    agent.q_table = np.random.RandomState(0).rand(NUM_STATES, 4).astype(np.float32)
+    filename = str(tmp_path / "brain.pkl")
+    agent.save_model(filename)
+    server = make_server(filename, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    agent.epsilon = 0.0
+    yield server, agent
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, path, body):
+    conn = http.client.HTTPConnection(*server.server_address)
+    conn.request("POST", path, body=body)
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    return response.status, data
+
+
+def test_actions_match_choose_action(server):
+    server, agent = server
+    rng = np.random.RandomState(1)
+    states = rng.randint(0, 21, (50, 4))
+    greens = rng.randint(0, 4, 50)
+    expected = [agent.choose_action(tuple(int(c) for c in s), int(g)) for s, g in zip(states, greens)]
+
+    client = PolicyClient(*server.server_address)
+    assert client.act(states, greens).tolist() == expected
+    client.close()
+    status, data = post(server, "/act", json.dumps({'states': states.tolist(), 'greens': greens.tolist()}))
+    assert status == 200 and json.loads(data)['actions'] == expected
+
+
+@pytest.mark.parametrize("body", [
+    b"not json",
+    json.dumps({'states': [[1, 2, 3, 4]]}).encode(),
+    json.dumps({'states': [[1, 2, 3, 4]], 'greens': [0, 1]}).encode(),
+    json.dumps({'states': [[1, 2, 3, 4]], 'greens': [7]}).encode(),
+])
+def test_bad_requests_get_400(server, body):
+    status, data = post(server[0], "/act", body)
+    assert status == 400
+    assert 'error' in json.loads(data)
@@ -0,0 +1,31 @@
+import json
+import random
+import numpy as np
+from profiling import PhaseProfiler, PHASES, COUNTERS
+from simulation import TrafficEnv
+
+
+def test_env_step_counts_and_times_phases(tmp_path):
+    np.random.seed(0)
+    random.seed(0)
+    env = TrafficEnv()
+    env.profiler = prof = PhaseProfiler()
+    for episode in range(2):
+        env.reset()
+        for step in range(100):
+            env.step(step // 45 % 4)
+        row = prof.end_episode(reward=0.0)
+        assert row['episode'] == episode + 1
+        assert row['steps'] == 100
+        assert row['switches'] >= 1
+        assert all(row[f"{p}_s"] >= 0 for p in PHASES)
+        assert row['other_s'] >= 0
+
+    totals = prof.totals()
+    assert totals['steps'] == 200
+    assert set(COUNTERS) <= set(totals)
+
+    filename = str(tmp_path / "profile.json")
+    prof.to_json(filename)
+    with open(filename) as f:
+        assert len(json.load(f)['episodes']) == 2
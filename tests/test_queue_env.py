@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+from queue_env import QueueTrafficEnv, DEFAULT_PARAMS, calibrate, compare_backends
+from simulation import TrafficEnv
+
+
+def test_calibration_reproduces_default_params():
+    assert calibrate() == DEFAULT_PARAMS
+
+
+def test_backends_agree_under_a_random_policy():
+    results = compare_backends(steps=3000)
+    pixel, queue = results['pixel'], results['queue']
+    assert queue['queue'] == pytest.approx(pixel['queue'], rel=0.1)
+    assert queue['all_red_per_switch'] == pytest.approx(pixel['all_red_per_switch'], rel=0.1)
+
+
+def test_same_initial_queues_as_traffic_env():
+    for seed in range(5):
+        pixel = TrafficEnv(rng=np.random.RandomState(seed))
+        queue = QueueTrafficEnv(rng=np.random.RandomState(seed))
+        assert queue._get_simplified_state() == pixel._get_simplified_state()
+        assert len(queue._get_feature_state()) == len(pixel._get_feature_state())
@@ -0,0 +1,46 @@
+import random
+import numpy as np
+from recorder import EpisodeRecorder, load_recording
+from simulation import TrafficEnv
+
+
+def record_run(filename, episodes=2, steps=40):
+    np.random.seed(0)
+    random.seed(0)
+    env = TrafficEnv()
+    expected = []
+    with EpisodeRecorder(filename, chunk_size=16) as recorder:
+        for _ in range(episodes):
+            recorder.start_episode()
+            env.reset()
+            for step in range(steps):
+                action = step // 10 % 4
+                _, reward = env.step(action)
+                recorder.record(env, action, reward)
+                cars = [(c.x, c.y) for lane in env.sim.lanes for c in lane]
+                cars += [(c.x, c.y) for c in env.sim.leaving_cars]
+                expected.append((env.sim.ticks, [len(l) for l in env.sim.lanes], cars))
+    return expected
+
+
+def test_recording_round_trips(tmp_path):
+    filename = str(tmp_path / "episodes.bin")
+    expected = record_run(filename)
+    steps, cars = load_recording(filename)
+    assert len(steps) == len(expected) == 80
+    assert steps['episode'].tolist() == [0] * 40 + [1] * 40
+    for row, (ticks, queues, positions) in zip(steps, expected):
+        assert row['tick'] == ticks
+        assert row['queues'].tolist() == queues
+        frame = cars[row['car_start']:row['car_start'] + row['car_count']]
+        np.testing.assert_allclose(np.c_[frame['x'], frame['y']].reshape(-1, 2),
+                                   np.array(positions, dtype=np.float32).reshape(-1, 2))
+
+
+def test_partial_last_chunk_is_dropped(tmp_path):
+    filename = str(tmp_path / "episodes.bin")
+    record_run(filename, episodes=1, steps=20)
+    with open(filename, 'ab') as f:
+        f.write(b'\x93NUMPY partial')
+    steps, cars = load_recording(filename)
+    assert len(steps) == 20
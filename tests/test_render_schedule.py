@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip("pygame")
+from function import RenderSchedule
+
+
+def test_every_n_steps():
+    schedule = RenderSchedule(every_n_steps=3)
+    assert [t for t in range(10) if schedule.due(t)] == [0, 3, 6, 9]
+
+
+def test_zero_steps_disables_drawing():
+    schedule = RenderSchedule(every_n_steps=0)
+    assert not any(schedule.due(t) for t in range(10))
+    with pytest.raises(ValueError):
+        RenderSchedule(every_n_steps=-1)
+
+
+def test_max_fps_throttles_frames():
+    schedule = RenderSchedule(max_fps=1)
+    assert schedule.due(0)
+    assert not schedule.due(1)
@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+from agent import QLearner, ReplayBuffer, TileCodingLearner
+from simulation import TrafficEnv, FEATURE_LOW, FEATURE_HIGH
+from training import run_episode
+
+
+def test_tile_coder_learns_from_feature_states():
+    np.random.seed(0)
+    agent = TileCodingLearner(low=FEATURE_LOW, high=FEATURE_HIGH)
+    run_episode(TrafficEnv(), agent, 100, features=True)
+    assert agent.weights.any()
+    assert agent.weights.shape == (agent.memory_size, 4)
+
+
+def test_replay_rejects_feature_states():
+    with pytest.raises(ValueError):
+        run_episode(TrafficEnv(), QLearner(), 10, replay_buffer=ReplayBuffer(100), features=True)
@@ -0,0 +1,46 @@
+import random
+import numpy as np
+import pytest
+from simulation import TrafficEnv, TrafficSimulation
+from vec_env import VecTrafficEnv, lane_axes
+
+
+class SharedStream:
+    # Generator-style facade over a RandomState, so VecTrafficEnv draws the
+    # same numbers in the same order as TrafficEnv: four per reset, four per step
+    def __init__(self, seed):
+        self.rs = np.random.RandomState(seed)
+
+    def integers(self, low, high, size=None):
+        return self.rs.randint(low, high, size)
+
+    def random(self, size=None):
+        return self.rs.random_sample(size)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_traffic_env_step_by_step(seed):
+    random.seed(seed)
+    env = TrafficEnv(rng=np.random.RandomState(seed))
+    vec = VecTrafficEnv(1)
+    vec.rng = SharedStream(seed)
+    states = vec.reset()
+    assert tuple(states[0]) == env._get_simplified_state()
+
+    actions = np.random.RandomState(100 + seed).randint(4, size=1000)
+    for action in actions:
+        state, reward = env.step(int(action))
+        states, rewards = vec.step([action])
+        assert tuple(states[0]) == state
+        assert rewards[0] == pytest.approx(reward, abs=1e-9)
+        assert vec.ticks[0] == env.sim.ticks
+        assert vec.current_green[0] == env.current_green
+
+
+def test_lane_axes_follow_the_simulation_geometry():
+    sim = TrafficSimulation()
+    sim.road_w += 40
+    stop, box_lo, box_hi, exit_ = lane_axes(sim)
+    default = lane_axes()
+    assert ((box_hi - box_lo) == (default[2] - default[1]) + 40).all()
+    np.testing.assert_array_equal(exit_, default[3])
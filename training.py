@@ -0,0 +1,67 @@
+# Headless training loop shared by the batch tools (sweeps, parallel training, evaluation)
+
+def run_episode(env, agent, steps_per_episode=150, replay_buffer=None, batch_size=64, features=False):
+    # With a ReplayBuffer, every transition is also stored and one minibatch
+    # is replayed per step on top of the online update. features=True feeds
+    # the agent env._get_feature_state() instead of the simplified state.
+    if features and replay_buffer is not None:
+        # Only QLearner replays, and it can only index the simplified state
+        raise ValueError("replay_buffer needs simplified states, not features=True")
+    state = env.reset()
+    if features:
+        state = env._get_feature_state()
+    total_reward = 0
+    prof = env.profiler
+
+    for step in range(steps_per_episode):
+        t = prof.start()
+        action = agent.choose_action(state, env.current_green)
+        prof.stop('action', t)
+
+        next_state, reward = env.step(action)
+        if next_state is None: break
+        if features:
+            next_state = env._get_feature_state()
+
+        if agent.epsilon > 0:
+            t = prof.start()
+            agent.update_q_value(state, action, reward, next_state)
+            if replay_buffer is not None:
+                replay_buffer.add(state, action, reward, next_state)
+                if len(replay_buffer) >= batch_size:
+                    agent.replay_update(replay_buffer, batch_size)
+            prof.stop('update', t)
+
+        state = next_state
+        total_reward += reward
+
+    prof.end_episode(reward=total_reward)
+    return total_reward
+
+def train_agent(env, agent, episodes=200, steps_per_episode=150, epsilon_decay=0.99, epsilon_min=0.05,
+                replay_buffer=None, batch_size=64, features=False):
+    rewards_history = []
+    for episode in range(episodes):
+        rewards_history.append(run_episode(env, agent, steps_per_episode, replay_buffer, batch_size, features))
+        if agent.epsilon > epsilon_min:
+            agent.epsilon *= epsilon_decay
+    return rewards_history
+
+def epsilon_at(episode, exploration_rate=1.0, epsilon_decay=0.99, epsilon_min=0.05):
+    # Epsilon after `episode` finished episodes of the train_agent schedule,
+    # for trainers that hand episodes out to several workers
+    epsilon = exploration_rate
+    for _ in range(episode):
+        if epsilon <= epsilon_min: break
+        epsilon *= epsilon_decay
+    return epsilon
+
+def run_fixed_time_episode(env, steps_per_episode=150, green_duration=60):
+    # The fixed-time baseline from main.run_fixed_time, without rendering
+    total_reward = 0
+    env.reset()
+    for step in range(steps_per_episode):
+        next_state, reward = env.step((step // green_duration) % 4)
+        if next_state is None: break
+        total_reward += reward
+    return total_reward
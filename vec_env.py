@@ -0,0 +1,226 @@
+import numpy as np
+from simulation import (GAP_SIZE, MAX_QUEUE, ARRIVAL_PROB, RELEASE_INTERVAL_TICKS, EXIT_X, EXIT_Y,
+                        TrafficSimulation)
+
+APPROACHING = 0
+WAITING = 1
+LEAVING_SLOTS = 16
+
+def lane_axes(sim=None):
+    # Every lane is one straight line, so a car is just its distance travelled
+    # from the spawn point. Returns per-lane stop, clearance box and exit
+    # distances along that line, taken from the pixel geometry in simulation.py.
+    sim = sim if sim is not None else TrafficSimulation()
+    x1, x2, y1, y2 = sim.clearance_box()
+    box = {'x': (x1, x2), 'y': (y1, y2)}
+    bounds = {'x': EXIT_X, 'y': EXIT_Y}
+    axis_of = {'down': ('y', 1), 'up': ('y', -1), 'left': ('x', -1), 'right': ('x', 1)}
+
+    stop, box_lo, box_hi, exit_ = (np.zeros(4) for _ in range(4))
+    for lane in range(4):
+        stop_base, start, d = sim.lane_spawn(lane)
+        axis, sign = axis_of[d]
+        origin = start[1] if axis == 'y' else start[0]
+        lo, hi = sorted((sign * (box[axis][0] - origin), sign * (box[axis][1] - origin)))
+        stop[lane] = sign * (stop_base - origin)
+        box_lo[lane], box_hi[lane] = lo, hi
+        exit_[lane] = sign * ((bounds[axis][1] if sign > 0 else bounds[axis][0]) - origin)
+    return stop, box_lo, box_hi, exit_
+
+class VecTrafficEnv:
+    # N independent intersections stepped together. Car state is kept as
+    # struct-of-arrays buffers: queued cars are (N, 4 lanes, MAX_QUEUE) slots in
+    # queue order, cars crossing the junction are (N, LEAVING_SLOTS) slots.
+    # Dynamics, rewards and phase rules follow TrafficEnv/CarEntity.
+    def __init__(self, num_envs, seed=None, arrival_prob=ARRIVAL_PROB):
+        self.num_envs = num_envs
+        self.action_space = [0, 1, 2, 3]
+        self.min_duration = 40
+        self.max_green_duration = 60
+        self.rng = np.random.default_rng(seed)
+        self.arrival_prob = np.broadcast_to(np.asarray(arrival_prob, dtype=float), (num_envs, 4)).copy()
+
+        self.stop, self.box_lo, self.box_hi, self.exit = lane_axes()
+        self.targets = self.stop[:, None] - np.arange(MAX_QUEUE)[None, :] * GAP_SIZE
+
+        n = num_envs
+        self.q_pos = np.zeros((n, 4, MAX_QUEUE))
+        self.q_speed = np.zeros((n, 4, MAX_QUEUE))
+        self.q_state = np.zeros((n, 4, MAX_QUEUE), dtype=np.int8)
+        self.q_wait = np.zeros((n, 4, MAX_QUEUE), dtype=np.int32)
+        self.q_count = np.zeros((n, 4), dtype=np.int32)
+
+        self.l_pos = np.zeros((n, LEAVING_SLOTS))
+        self.l_speed = np.zeros((n, LEAVING_SLOTS))
+        self.l_lane = np.zeros((n, LEAVING_SLOTS), dtype=np.int8)
+        self.l_active = np.zeros((n, LEAVING_SLOTS), dtype=bool)
+        # Per-slot clearance box and exit distance; free slots get an empty box
+        self.l_box_lo = np.full((n, LEAVING_SLOTS), np.inf)
+        self.l_box_hi = np.full((n, LEAVING_SLOTS), -np.inf)
+        self.l_exit = np.zeros((n, LEAVING_SLOTS))
+        # Slots are filled lowest-free-first, so only the first l_high have
+        # ever held a car since reset; the rest are empty and skipped
+        self.l_high = 0
+
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.last_release_tick = np.zeros(n, dtype=np.int64)
+        self.current_green = np.zeros(n, dtype=np.int64)
+        self.steps_in_current_phase = np.zeros(n, dtype=np.int64)
+        self.prev_wait = np.zeros(n, dtype=np.int64)
+        self.exited = np.zeros((n, 4), dtype=np.int32)
+        self.reset()
+
+    @property
+    def state(self):
+        return self.q_count.copy()
+
+    def _get_simplified_state(self):
+        return np.minimum(self.q_count, MAX_QUEUE)
+
+    def reset(self):
+        n = self.num_envs
+        self.q_count[:] = self.rng.integers(1, 4, size=(n, 4))
+        self.q_pos[:] = self.targets[None, :, :]
+        self.q_speed[:] = 0.0
+        self.q_state[:] = WAITING
+        self.q_wait[:] = 0
+        self.l_active[:] = False
+        self.l_box_lo[:] = np.inf
+        self.l_box_hi[:] = -np.inf
+        self.l_high = 0
+        self.ticks[:] = 0
+        self.last_release_tick[:] = -RELEASE_INTERVAL_TICKS - 1
+        self.current_green[:] = 0
+        self.steps_in_current_phase[:] = 0
+        self.prev_wait[:] = 0
+        return self._get_simplified_state()
+
+    def _queue_mask(self, k=MAX_QUEUE):
+        return np.arange(k)[None, None, :] < self.q_count[:, :, None]
+
+    def is_intersection_clear(self, envs=None):
+        ls = (slice(None) if envs is None else envs, slice(None, self.l_high))
+        pos = self.l_pos[ls]
+        return ~((pos > self.l_box_lo[ls]) & (pos < self.l_box_hi[ls])).any(axis=1)
+
+    def _tick(self, green, envs=None):
+        # One physics tick for `envs` (index array, None for all); green is -1
+        # for all red. Slots past q_count hold stale values and are simply
+        # overwritten on spawn, which is cheaper than masking them out, and
+        # slots past the longest queue are skipped altogether: queues rarely
+        # get past a handful of cars, so this is most of the per-tick work.
+        sel = slice(None) if envs is None else envs
+        green = green[sel]
+        rows = np.arange(len(green))
+        ticks = self.ticks[sel] + 1
+        self.ticks[sel] = ticks
+
+        # Queued cars (CarEntity.update with car_index_in_queue = slot)
+        k = max(int(self.q_count[sel].max(initial=0)), 1)
+        qs = (sel, slice(None), slice(None, k))
+        pos, speed, state = self.q_pos[qs], self.q_speed[qs], self.q_state[qs]
+        self.q_wait[qs] += (state == WAITING) & (speed < 0.1)
+        dist = self.targets[:, :k] - pos
+        far = dist > 40
+        near = ~far & (dist > 1)
+        speed = np.where(far, np.minimum(speed + 0.4, 4.0),
+                         np.where(near, np.minimum(dist * 0.3, 4.0), 0.0))
+        state = np.where(far, APPROACHING, np.where(near, state, WAITING)).astype(np.int8)
+        pos = pos + speed
+        self.q_pos[qs], self.q_speed[qs], self.q_state[qs] = pos, speed, state
+
+        # Head of the green lane crosses once the box is clear and the gap has passed
+        g = np.maximum(green, 0)
+        release = ((green >= 0) & (self.q_count[sel][rows, g] > 0)
+                   & self.is_intersection_clear(envs)
+                   & (ticks - self.last_release_tick[sel] > RELEASE_INTERVAL_TICKS)
+                   & ((self.stop[g] - pos[rows, g, 0] < 100) | (state[rows, g, 0] == WAITING)))
+        r = np.flatnonzero(release)
+        if len(r):
+            lanes = g[r]
+            r_env = r if envs is None else envs[r]
+            slot = np.argmin(self.l_active[r_env], axis=1)
+            self.l_pos[r_env, slot] = pos[r, lanes, 0]
+            self.l_speed[r_env, slot] = speed[r, lanes, 0]
+            self.l_lane[r_env, slot] = lanes
+            self.l_box_lo[r_env, slot] = self.box_lo[lanes]
+            self.l_box_hi[r_env, slot] = self.box_hi[lanes]
+            self.l_exit[r_env, slot] = self.exit[lanes]
+            self.l_active[r_env, slot] = True
+            self.l_high = max(self.l_high, int(slot.max()) + 1)
+            for buf in (self.q_pos, self.q_speed, self.q_state, self.q_wait):
+                buf[r_env, lanes, :k - 1] = buf[r_env, lanes, 1:k]
+            self.q_count[r_env, lanes] -= 1
+            self.last_release_tick[r_env] = ticks[r]
+
+        # Leaving cars accelerate away and are dropped past the screen edge
+        ls = (sel, slice(None, self.l_high))
+        l_speed = np.minimum(self.l_speed[ls] + 0.3, 6.0)
+        l_pos = self.l_pos[ls] + l_speed
+        self.l_speed[ls], self.l_pos[ls] = l_speed, l_pos
+        gone = self.l_active[ls] & (l_pos >= self.l_exit[ls])
+        if gone.any():
+            g_rows, g_slots = np.nonzero(gone)
+            g_env = g_rows if envs is None else envs[g_rows]
+            np.add.at(self.exited, (g_env, self.l_lane[g_env, g_slots]), 1)
+            self.l_active[g_env, g_slots] = False
+            self.l_box_lo[g_env, g_slots] = np.inf
+            self.l_box_hi[g_env, g_slots] = -np.inf
+        return release
+
+    def _random_arrivals(self):
+        rows = np.arange(self.num_envs)[:, None]
+        lanes = np.arange(4)[None, :]
+        last = self.q_pos[rows, lanes, np.maximum(self.q_count - 1, 0)]
+        safe = (self.q_count == 0) | (last >= 110)
+        arrive = (self.rng.random((self.num_envs, 4)) < self.arrival_prob) & (self.q_count < MAX_QUEUE) & safe
+        self._spawn(arrive)
+
+    def _spawn(self, mask):
+        env_idx, lane_idx = np.nonzero(mask)
+        slot = self.q_count[env_idx, lane_idx]
+        self.q_pos[env_idx, lane_idx, slot] = 0.0
+        self.q_speed[env_idx, lane_idx, slot] = 0.0
+        self.q_state[env_idx, lane_idx, slot] = APPROACHING
+        self.q_wait[env_idx, lane_idx, slot] = 0
+        self.q_count[env_idx, lane_idx] += 1
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        actions = np.where(self.steps_in_current_phase < self.min_duration, self.current_green, actions)
+        actions = np.where(self.steps_in_current_phase > self.max_green_duration,
+                           np.argmax(self.q_count, axis=1), actions)
+
+        switched = actions != self.current_green
+        self.exited[:] = 0
+        # All red for the switching envs until their junction is clear
+        pending = np.flatnonzero(switched & ~self.is_intersection_clear())
+        all_red = np.full(self.num_envs, -1)
+        while len(pending):
+            self._tick(all_red, pending)
+            pending = pending[~self.is_intersection_clear(pending)]
+
+        self.current_green = np.where(switched, actions, self.current_green)
+        self.steps_in_current_phase = np.where(switched, 0, self.steps_in_current_phase + 1)
+
+        self._random_arrivals()
+
+        # reward system (same as TrafficEnv.step)
+        total_queue = self.q_count.sum(axis=1)
+        queue_penalty = -(total_queue / 20.0)
+
+        k = max(int(self.q_count.max()), 1)
+        curr_wait = (self.q_wait[:, :, :k] * self._queue_mask(k)).sum(axis=(1, 2))
+        wait_penalty = (self.prev_wait - curr_wait) / 50.0
+        self.prev_wait = curr_wait
+
+        rows = np.arange(self.num_envs)
+        flow_bonus = np.where(self.q_count[rows, self.current_green] > 0, 0.2, 0.0)
+        change_penalty = np.where(actions != self.current_green, -0.2, 0.0)
+
+        rewards = np.clip(queue_penalty + wait_penalty + flow_bonus + change_penalty, -1.0, 1.0)
+        next_states = self._get_simplified_state()
+
+        self._tick(self.current_green)
+
+        return next_states, rewards